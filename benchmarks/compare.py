@@ -0,0 +1,52 @@
+"""Сравнивает два прогона benchmarks/run.py.
+
+    python benchmarks/compare.py results/old.json results/new.json
+"""
+import json
+import sys
+
+COLUMNS = ('p50_ms', 'p99_ms', 'rps')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as result_file:
+        return json.load(result_file)
+
+
+def change(old, new):
+    if not old:
+        return '   n/a'
+    return f'{(new - old) / old * 100:+6.1f}%'
+
+
+def compare(old, new):
+    lines = [
+        f'{old["meta"]["commit"]} -> {new["meta"]["commit"]}',
+    ]
+    for transport, routes in new['results'].items():
+        lines.append(f'\n[{transport}]')
+        lines.append(f'{"route":<28}' + ''.join(
+            f'{column:>28}' for column in COLUMNS
+        ))
+        previous = old['results'].get(transport, {})
+        for route, result in routes.items():
+            before = previous.get(route)
+            if not result or not before:
+                lines.append(f'{route:<28}{"не с чем сравнить":>28}')
+                continue
+            lines.append(f'{route:<28}' + ''.join(
+                f'{before[column]:>10} -> {result[column]:<8} '
+                f'{change(before[column], result[column])}'
+                for column in COLUMNS
+            ))
+    return '\n'.join(lines)
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    print(compare(load(sys.argv[1]), load(sys.argv[2])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Синтетические данные для бенчмарков: mixer и Faker с фиксированным seed."""
+import random
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from faker import Faker
+from mixer.backend.django import Mixer
+from PIL import Image
+
+from posts.models import Comment, Follow, Group, Post, User
+
+DEFAULTS = {
+    'users': 200,
+    'groups': 20,
+    'posts': 2000,
+    'comments': 5000,
+    'images': 0.1,
+    'follow_alpha': 1.2,
+    'seed': 1,
+}
+
+
+def zipf_weights(size, alpha):
+    """Вес элемента с рангом r пропорционален 1 / r ** alpha."""
+    return [1 / rank ** alpha for rank in range(1, size + 1)]
+
+
+def sample_image(rng, name):
+    color = tuple(rng.randrange(256) for _ in range(3))
+    buffer = BytesIO()
+    Image.new('RGB', (1280, 720), color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+def seed(users, groups, posts, comments, images, follow_alpha, seed):
+    """Заполняет базу и возвращает образцы объектов для маршрутов.
+
+    Популярность авторов, групп и постов распределена по Ципфу: немногие
+    получают большую часть подписчиков, постов и комментариев.
+    """
+    rng = random.Random(seed)
+    faker = Faker('ru_RU')
+    faker.seed_instance(seed)
+    mixer = Mixer(locale='ru_RU')
+    mixer.faker.seed_instance(seed)
+
+    user_list = mixer.cycle(users).blend(
+        User, username=(f'user{number}' for number in range(users))
+    )
+    group_list = mixer.cycle(groups).blend(
+        Group, slug=(f'group-{number}' for number in range(groups))
+    )
+    author_weights = zipf_weights(users, follow_alpha)
+    group_weights = zipf_weights(groups, 1.0)
+
+    follows = set()
+    for user in user_list:
+        # Число подписок тоже с тяжёлым хвостом.
+        count = min(int(rng.paretovariate(1.5)) * 3, users - 1)
+        for author in rng.choices(user_list, author_weights, k=count):
+            if author != user:
+                follows.add((user, author))
+    for user, author in follows:
+        Follow.objects.create(user=user, author=author)
+
+    post_list = []
+    for number in range(posts):
+        image = None
+        if rng.random() < images:
+            image = sample_image(rng, f'bench-{seed}-{number}.jpg')
+        post_list.append(Post.objects.create(
+            author=rng.choices(user_list, author_weights)[0],
+            group=(rng.choices(group_list, group_weights)[0]
+                   if rng.random() < 0.7 else None),
+            text=faker.paragraph(nb_sentences=rng.randint(1, 8)),
+            image=image,
+        ))
+
+    post_weights = zipf_weights(posts, 1.0)
+    commented = rng.choices(post_list, post_weights, k=comments)
+    mixer.cycle(comments).blend(
+        Comment,
+        post=(post for post in commented),
+        author=(rng.choice(user_list) for _ in range(comments)),
+        text=(faker.sentence() for _ in range(comments)),
+    )
+    member = user_list[-1]
+    own_post = Post.objects.filter(author=member).first()
+    if own_post is None:
+        own_post = Post.objects.create(author=member, text=faker.sentence())
+    return {
+        'user': member,
+        'own_post': own_post,
+        'author': user_list[0],
+        'group': group_list[0],
+        # Самый комментируемый пост.
+        'post': post_list[0],
+        'counts': {
+            'users': users,
+            'groups': groups,
+            'posts': posts,
+            'comments': comments,
+            'follows': len(follows),
+        },
+    }
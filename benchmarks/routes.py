@@ -0,0 +1,57 @@
+"""Маршруты posts/urls.py и параметры, с которыми их замерять."""
+from collections import namedtuple
+
+from django.urls import reverse
+
+from posts import urls
+
+Route = namedtuple('Route', 'method kwargs login data query')
+
+
+def route(method='GET', kwargs=None, login=False, data=None, query=''):
+    return Route(method, kwargs or {}, login, data, query)
+
+
+def routes(sample):
+    """Маршрут -> Route для каждого имени из posts/urls.py.
+
+    Маршруты, которых нет в таблице, возвращаются с None: их видно
+    в отчёте как незамеренные.
+    """
+    post = {'post_id': sample['post'].pk}
+    author = {'username': sample['author'].username}
+    group = {'slug': sample['group'].slug}
+    table = {
+        'index': route(),
+        'index_feed': route(kwargs={'feed_type': 'atom'}),
+        'group_list': route(kwargs=group),
+        'group_feed': route(kwargs={**group, 'feed_type': 'rss'}),
+        'profile': route(kwargs=author),
+        'profile_feed': route(kwargs={**author, 'feed_type': 'atom'}),
+        'post_detail': route(kwargs=post),
+        'comments': route(kwargs=post, query='format=json'),
+        'post_create': route(login=True),
+        'post_edit': route(
+            kwargs={'post_id': sample['own_post'].pk}, login=True
+        ),
+        'add_comment': route(
+            'POST', kwargs=post, login=True, data={'text': 'Бенчмарк'}
+        ),
+        'follow_index': route(login=True),
+        'search': route(query='q=пост'),
+        'profile_follow': route(kwargs=author, login=True),
+        'profile_unfollow': route(kwargs=author, login=True),
+        'follow_bulk': route(
+            'POST', login=True,
+            data={'action': 'follow', 'username': [author['username']]},
+        ),
+    }
+    return {
+        f'posts:{pattern.name}': table.get(pattern.name)
+        for pattern in urls.urlpatterns
+    }
+
+
+def url_for(name, spec):
+    url = reverse(name, kwargs=spec.kwargs)
+    return f'{url}?{spec.query}' if spec.query else url
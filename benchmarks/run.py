@@ -0,0 +1,258 @@
+"""Замеряет задержку и пропускную способность маршрутов posts/urls.py.
+
+Запуск из корня репозитория:
+
+    python benchmarks/run.py --posts 5000 --iterations 200
+
+База — временная тестовая, заполняется benchmarks/dataset.py.
+Результат пишется в benchmarks/results/<коммит>.json, сравнение двух
+прогонов — benchmarks/compare.py.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'yatube'), os.path.join(ROOT)]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+# Замеряем так, как работает прод: шаблоны разобраны и в памяти.
+os.environ.setdefault('YATUBE_TEMPLATE_PROFILE', 'production')
+
+import django  # noqa: E402
+
+django.setup()
+
+import requests  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings, setup_databases, setup_test_environment,
+    teardown_databases
+)
+
+from benchmarks import dataset  # noqa: E402
+from benchmarks.routes import routes, url_for  # noqa: E402
+from core import thumbnails  # noqa: E402
+
+PERCENTILES = (50, 90, 99)
+CSRF_SECRET = 'b' * 32
+
+
+def percentile(ordered, rank):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(latencies, total, statuses):
+    ordered = sorted(latencies)
+    result = {
+        f'p{rank}_ms': round(percentile(ordered, rank) * 1000, 3)
+        for rank in PERCENTILES
+    }
+    result.update(
+        mean_ms=round(sum(ordered) / len(ordered) * 1000, 3),
+        rps=round(len(ordered) / total, 1),
+        requests=len(ordered),
+        statuses=dict(statuses),
+    )
+    return result
+
+
+def measure(send, iterations, warmup, cold):
+    for _ in range(warmup):
+        send()
+    thumbnails.drain()
+    latencies = []
+    statuses = Counter()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        request_started = time.perf_counter()
+        status = send()
+        latencies.append(time.perf_counter() - request_started)
+        statuses[status] += 1
+    return summarize(latencies, time.perf_counter() - started, statuses)
+
+
+class ClientTransport:
+    """Запросы через django.test.Client, без сети и сервера."""
+
+    def __init__(self, user):
+        self.guest = Client()
+        self.member = Client()
+        self.member.force_login(user)
+
+    def sender(self, url, spec):
+        client = self.member if spec.login else self.guest
+        if spec.method == 'POST':
+            return lambda: client.post(url, spec.data).status_code
+        return lambda: client.get(url).status_code
+
+    def close(self):
+        pass
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class WSGITransport:
+    """Настоящие HTTP-запросы к WSGI-серверу в соседнем потоке."""
+
+    def __init__(self, user):
+        self.server = make_server(
+            '127.0.0.1', 0, get_wsgi_application(),
+            handler_class=QuietHandler,
+        )
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        self.guest = requests.Session()
+        self.member = requests.Session()
+        login = Client()
+        login.force_login(user)
+        self.member.cookies.set(
+            settings.SESSION_COOKIE_NAME,
+            login.cookies[settings.SESSION_COOKIE_NAME].value,
+        )
+        # Старый формат токена CSRF: секрет без соли годится и как cookie,
+        # и как заголовок.
+        self.member.cookies.set(settings.CSRF_COOKIE_NAME, CSRF_SECRET)
+        self.member.headers['X-CSRFToken'] = CSRF_SECRET
+
+    def sender(self, url, spec):
+        session = self.member if spec.login else self.guest
+        url = self.base + url
+
+        def send():
+            response = session.request(
+                spec.method, url, data=spec.data, allow_redirects=False
+            )
+            return response.status_code
+        return send
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+TRANSPORTS = {'client': ClientTransport, 'wsgi': WSGITransport}
+
+
+def commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for name, default in dataset.DEFAULTS.items():
+        parser.add_argument(
+            f'--{name.replace("_", "-")}', type=type(default),
+            default=default,
+        )
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument(
+        '--transport', choices=TRANSPORTS, action='append',
+        help='client, wsgi или оба (по умолчанию оба).',
+    )
+    parser.add_argument(
+        '--cold', action='store_true',
+        help='Чистить кэш перед каждым запросом.',
+    )
+    parser.add_argument('--only', action='append', help='Имя маршрута.')
+    parser.add_argument('--output', help='Файл для результатов JSON.')
+    return parser.parse_args()
+
+
+def run(args):
+    params = {name: getattr(args, name) for name in dataset.DEFAULTS}
+    started = time.perf_counter()
+    sample = dataset.seed(**params)
+    seed_seconds = time.perf_counter() - started
+    thumbnails.drain()
+    results = {}
+    for name in args.transport or list(TRANSPORTS):
+        transport = TRANSPORTS[name](sample['user'])
+        results[name] = {}
+        try:
+            for route_name, spec in routes(sample).items():
+                if args.only and route_name not in args.only:
+                    continue
+                if spec is None:
+                    results[name][route_name] = None
+                    continue
+                url = url_for(route_name, spec)
+                results[name][route_name] = measure(
+                    transport.sender(url, spec),
+                    args.iterations, args.warmup, args.cold,
+                )
+                print(name, route_name, results[name][route_name],
+                      file=sys.stderr)
+        finally:
+            transport.close()
+    return {
+        'meta': {
+            'commit': commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'cache': settings.CACHES['default']['BACKEND'],
+            'dataset': {**params, **sample['counts']},
+            'seed_seconds': round(seed_seconds, 1),
+            'iterations': args.iterations,
+            'cold': args.cold,
+        },
+        'results': results,
+    }
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as media_root:
+        with override_settings(
+            MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0,
+            ALLOWED_HOSTS=['*'],
+            # Кэш в памяти не трогает кэш запущенного сайта, а в одном
+            # процессе он общий для всех запросов, как Redis в проде.
+            CACHES=settings.LOCMEM_CACHES, CACHE_SHARED=True,
+        ):
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                report = run(args)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f'{report["meta"]["commit"]}.json'
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as result_file:
+        json.dump(report, result_file, ensure_ascii=False, indent=2)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
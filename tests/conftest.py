@@ -1,4 +1,8 @@
 import os
+import shutil
+import tempfile
+
+import pytest
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
@@ -37,3 +41,25 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def thumbnails_without_workers(settings):
+    """Миниатюры не создаются фоновыми потоками во время тестов."""
+    settings.THUMBNAIL_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def temp_media_root(settings):
+    """Картинки mixer и миниатюры пишутся во временный каталог."""
+    media_root = tempfile.mkdtemp()
+    settings.MEDIA_ROOT = media_root
+    yield media_root
+    shutil.rmtree(media_root, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    """Кэш в памяти: тесты не чистят и не засоряют кэш запущенного сайта."""
+    settings.CACHES = settings.LOCMEM_CACHES
+    settings.CACHE_SHARED = False
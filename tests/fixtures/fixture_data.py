@@ -2,7 +2,7 @@ import tempfile
 
 import pytest
 from mixer.backend.django import mixer as _mixer
-from posts.models import Post, Group
+from posts.models import Follow, Post, Group
 
 
 @pytest.fixture()
@@ -45,3 +45,15 @@ def few_posts_with_group(mixer, user, group):
 def another_few_posts_with_group_with_follower(mixer, user, another_user, group):
     mixer.blend('posts.Follow', user=user, author=another_user)
     mixer.cycle(20).blend(Post, author=another_user, group=group)
+
+
+@pytest.fixture
+def feed_factory(mixer, user, another_user, group):
+    """Функция, которая наполняет каждую ленту size постами."""
+    def make(size):
+        Follow.objects.get_or_create(user=user, author=another_user)
+        posts = mixer.cycle(size).blend(Post, author=another_user, group=group, image='')
+        for post in posts:
+            mixer.blend('posts.Comment', post=post, author=user)
+        return posts[0]
+    return make
@@ -0,0 +1,49 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+# Максимум SQL-запросов на страницу ленты, включая сессию и пользователя.
+QUERY_BUDGET = 6
+
+
+def feed_urls(post):
+    return [
+        '/',
+        f'/group/{post.group.slug}/',
+        f'/profile/{post.author.username}/',
+        f'/posts/{post.id}/',
+        '/follow/',
+    ]
+
+
+def count_queries(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, f'Страница `{url}` недоступна'
+    return len(queries)
+
+
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('size', [3, 25])
+    def test_feed_query_budget(self, user_client, feed_factory, size):
+        post = feed_factory(size)
+        for url in feed_urls(post):
+            queries = count_queries(user_client, url)
+            assert queries <= QUERY_BUDGET, (
+                f'Страница `{url}` выполняет {queries} запросов к базе, '
+                f'а допустимо не больше {QUERY_BUDGET}'
+            )
+
+    def test_feed_queries_do_not_depend_on_page_size(self, user_client, feed_factory):
+        post = feed_factory(2)
+        small = {url: count_queries(user_client, url) for url in feed_urls(post)}
+        feed_factory(20)
+        for url, queries in small.items():
+            assert count_queries(user_client, url) == queries, (
+                f'Число запросов на странице `{url}` растёт вместе с числом постов'
+            )
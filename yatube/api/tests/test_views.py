@@ -0,0 +1,81 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {number}', group=cls.group)
+            for number in range(15)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_cursor_pages(self):
+        """Лента листается по курсору без повторов и пропусков."""
+        url = reverse('api:posts')
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertIsNone(data['previous'])
+        second = self.client.get(data['next']).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        ids = [item['id'] for item in data['results'] + second['results']]
+        self.assertEqual(
+            ids, list(Post.objects.values_list('pk', flat=True)
+                      .order_by('-pub_date', '-pk')))
+
+    def test_sparse_fields(self):
+        """?fields отдаёт только запрошенные поля."""
+        data = self.client.get(
+            reverse('api:group_posts', kwargs={'slug': 'group'}),
+            {'fields': 'id,author', 'limit': 2},
+        ).json()
+        self.assertEqual(
+            data['results'][0], {'id': data['results'][0]['id'],
+                                 'author': 'author'})
+        self.assertIn('fields=id%2Cauthor', data['next'])
+        response = self.client.get(reverse('api:posts'), {'fields': 'pk'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_profile_and_follow(self):
+        """Профиль и подписки; без входа подписки недоступны."""
+        profile = self.client.get(
+            reverse('api:profile_posts', kwargs={'username': 'author'}))
+        self.assertEqual(len(profile.json()['results']), 10)
+        missing = self.client.get(
+            reverse('api:profile_posts', kwargs={'username': 'nobody'}))
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('api:follow')).status_code, 401)
+        follow = self.reader_client.get(reverse('api:follow')).json()
+        self.assertEqual(len(follow['results']), 10)
+        self.assertIsNotNone(follow['next'])
+
+    def test_compression(self):
+        """Ответ сжимается, если клиент это принимает."""
+        response = self.client.get(
+            reverse('api:posts'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertIn('Пост', gzip.decompress(response.content).decode())
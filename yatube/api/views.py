@@ -0,0 +1,148 @@
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from core.compression import compress
+from core.paginators import CursorPaginator, decode_cursor, split_key
+from posts import caching
+from posts.feed import follow_feed
+from posts.models import Group, Post, User
+from posts.views import COUNT_POST
+
+# Поле в ответе -> выражение для .values().
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+MAX_LIMIT = 100
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+class RowCursorPaginator(CursorPaginator):
+    """Курсорный пагинатор для словарей из .values()."""
+
+    def position(self, row):
+        return row[self.key], row['id']
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(status, detail):
+    return JsonResponse(
+        {'detail': detail}, status=status, json_dumps_params=JSON_PARAMS
+    )
+
+
+def requested_fields(request):
+    """Поля из ?fields=id,text; по умолчанию — все."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(FIELDS)
+    fields = [name for name in fields.split(',') if name]
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(sorted(unknown))}.')
+    return fields
+
+
+def requested_limit(request):
+    try:
+        limit = int(request.GET.get('limit', COUNT_POST))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def serialize(row, fields):
+    item = {name: row[FIELDS[name]] for name in fields}
+    if item.get('image'):
+        item['image'] = default_storage.url(item['image'])
+    return item
+
+
+def feed_response(request, post_list, key='pub_date'):
+    """Страница ленты в JSON без создания объектов моделей."""
+    try:
+        fields = requested_fields(request)
+        limit = requested_limit(request)
+    except BadRequest as bad_request:
+        return error(400, str(bad_request))
+    columns = {FIELDS[name] for name in fields} | {'id', split_key(key)[0]}
+    paginator = RowCursorPaginator(
+        post_list.values(*columns), limit, key=key
+    )
+    token = request.GET.get('cursor')
+    if token:
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return error(400, 'Неверный курсор.')
+        page_obj = paginator.seek_page(*cursor)
+    else:
+        page_obj = paginator.first_page()
+    return JsonResponse(
+        {
+            'results': [serialize(row, fields) for row in page_obj],
+            'next': page_link(request, page_obj.next_cursor),
+            'previous': page_link(request, page_obj.previous_cursor),
+        },
+        encoder=DjangoJSONEncoder,
+        json_dumps_params=JSON_PARAMS,
+    )
+
+
+@require_GET
+@compress
+@condition(caching.feed_etag, caching.feed_last_modified)
+def posts(request):
+    return feed_response(request, Post.objects.all())
+
+
+@require_GET
+@compress
+@condition(caching.feed_etag, caching.feed_last_modified)
+def group_posts(request, slug):
+    group_id = (
+        Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    )
+    if group_id is None:
+        return error(404, 'Группа не найдена.')
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+@require_GET
+@compress
+@condition(caching.feed_etag, caching.feed_last_modified)
+def profile_posts(request, username):
+    author_id = (
+        User.objects.filter(username=username)
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if author_id is None:
+        return error(404, 'Пользователь не найден.')
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+@require_GET
+@compress
+def follow(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация.')
+    post_list, key = follow_feed(request.user)
+    return feed_response(request, post_list, key)
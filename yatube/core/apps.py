@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.template import engines
+
+        # С кэширующим загрузчиком шаблоны разбираются один раз при
+        # запуске, а не на первых запросах.
+        for backend in engines.all():
+            if getattr(backend, 'precompile_on_start', False):
+                backend.precompile()
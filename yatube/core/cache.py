@@ -0,0 +1,98 @@
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import record_cache
+
+LOCK_SUFFIX = ':lock'
+# Сколько ждать чужого пересчёта, прежде чем считать самим.
+WAIT_TIMEOUT = 2.0
+WAIT_STEP = 0.05
+# Сколько живут ключи, которые другие процессы должны видеть сразу,
+# если кэш у каждого процесса свой: столько же, сколько до версий.
+LOCAL_TIMEOUT = 20
+
+_metrics = defaultdict(Counter)
+_metrics_lock = threading.Lock()
+
+
+def _count(name, event):
+    with _metrics_lock:
+        _metrics[name][event] += 1
+    record_cache(hit=event == 'hits')
+
+
+def metrics():
+    """Счётчики hit/miss/early/wait по именам, с начала работы процесса."""
+    with _metrics_lock:
+        return {name: dict(counter) for name, counter in _metrics.items()}
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def shared_timeout(timeout):
+    """Срок для ключа, смену которого должны сразу видеть все воркеры.
+
+    С общим кэшем (CACHE_SHARED) это timeout как есть. В кэше процесса
+    смена видна только ему, поэтому срок сокращается до LOCAL_TIMEOUT.
+    None — бессрочно.
+    """
+    if settings.CACHE_SHARED:
+        return timeout
+    if timeout is None:
+        return LOCAL_TIMEOUT
+    return min(timeout, LOCAL_TIMEOUT)
+
+
+def _should_refresh(entry, beta):
+    # XFetch: чем ближе срок и чем дольше пересчёт, тем вероятнее
+    # обновить значение заранее, пока остальные получают старое.
+    value, delta, expires = entry
+    return time.time() - delta * beta * math.log(random.random()) >= expires
+
+
+def _compute_and_store(key, compute, timeout):
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    cache.set(key, (value, delta, time.time() + timeout), timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout, name=None, beta=1.0):
+    """Значение из кэша или compute() с защитой от «стада».
+
+    Пересчитывает только тот, кто взял блокировку; остальные отдают
+    прежнее значение или недолго ждут нового.
+    """
+    name = name or key
+    entry = cache.get(key)
+    if entry is not None and not _should_refresh(entry, beta):
+        _count(name, 'hits')
+        return entry[0]
+    lock_key = key + LOCK_SUFFIX
+    if not cache.add(lock_key, 1, WAIT_TIMEOUT * 2):
+        if entry is not None:
+            _count(name, 'hits')
+            return entry[0]
+        _count(name, 'waits')
+        deadline = time.time() + WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(WAIT_STEP)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return compute()
+    _count(name, 'early' if entry is not None else 'misses')
+    try:
+        return _compute_and_store(key, compute, timeout)
+    finally:
+        cache.delete(lock_key)
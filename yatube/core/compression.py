@@ -0,0 +1,50 @@
+import re
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+# Короткие ответы сжатие только увеличивает.
+MIN_LENGTH = 200
+
+
+def compress_response(request, response):
+    """Сжимает ответ brotli, если он установлен и принят клиентом, иначе gzip.
+
+    Повторяет GZipMiddleware, но только для отдельных view.
+    """
+    if (response.streaming or response.has_header('Content-Encoding')
+            or len(response.content) < MIN_LENGTH):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli and ACCEPTS_BROTLI.search(accept_encoding):
+        encoding, content = 'br', brotli.compress(response.content)
+    elif ACCEPTS_GZIP.search(accept_encoding):
+        encoding, content = 'gzip', compress_string(response.content)
+    else:
+        return response
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        # Сжатое тело побайтно другое: ETag становится слабым.
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+def compress(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return compress_response(request, view(request, *args, **kwargs))
+    return wrapper
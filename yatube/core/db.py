@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router
+
+STICKY_COOKIE = 'primary_until'
+# Меньше этого числа строк точный COUNT(*) дешевле неточной оценки.
+ESTIMATE_MIN_ROWS = 100000
+_state = threading.local()
+
+
+def pinned_to_primary():
+    return getattr(_state, 'pinned', False)
+
+
+def pin_to_primary():
+    """До конца запроса читаем с основной базы."""
+    _state.pinned = True
+
+
+def unpin():
+    _state.pinned = False
+
+
+def writes_to_primary(view):
+    """Отмечает view, которое пишет в базу, даже если это GET.
+
+    После такого запроса пользователь какое-то время читает с основной
+    базы и сразу видит свои изменения.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        pin_to_primary()
+        request.wrote_to_primary = True
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Пишет в default, читает со случайной реплики из DATABASE_REPLICAS."""
+
+    def db_for_read(self, model, **hints):
+        if pinned_to_primary() or not settings.DATABASE_REPLICAS:
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """Read-your-writes: после записи читаем с основной базы.
+
+    Время, до которого действует привязка, хранится в cookie, поэтому
+    она переживает редирект после POST.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sticky_until = request.COOKIES.get(STICKY_COOKIE, '')
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            pin_to_primary()
+            request.wrote_to_primary = True
+        elif sticky_until.isdigit() and int(sticky_until) > time.time():
+            pin_to_primary()
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin()
+        if getattr(request, 'wrote_to_primary', False):
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time()) + seconds),
+                max_age=seconds,
+                httponly=True,
+            )
+        return response
+
+
+def estimated_count(model, min_rows=ESTIMATE_MIN_ROWS):
+    """Число строк таблицы по статистике базы, без COUNT(*).
+
+    Статистику собирает ANALYZE (в PostgreSQL ещё и autovacuum). Если её
+    нет или таблица меньше min_rows, возвращает None — тогда нужен
+    точный подсчёт.
+    """
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [table],
+            )
+            rows = [int(value) for value, in cursor.fetchall()]
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table]
+                )
+            except DatabaseError:
+                # Таблица статистики появляется после первого ANALYZE.
+                return None
+            # Первое число stat — строк в индексе, то есть в таблице;
+            # у частичных индексов меньше, поэтому берём наибольшее.
+            rows = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+        else:
+            return None
+    count = max(rows, default=0)
+    return count if count >= min_rows else None
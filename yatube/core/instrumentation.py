@@ -0,0 +1,235 @@
+"""Замеры запросов: время, SQL, кэш, шаблоны и размер ответа.
+
+Счётчики живут в памяти процесса и отдаются в формате Prometheus;
+при нескольких процессах каждый показывает свои.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('yatube.performance')
+
+# Границы гистограммы времени ответа, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Сколько самых долгих SQL-запросов попадает в запись о медленном запросе.
+TOP_QUERIES = 5
+SQL_PREVIEW = 300
+SUMS = (
+    'request_seconds', 'db_queries', 'db_seconds', 'cache_hits',
+    'cache_misses', 'template_seconds', 'response_bytes',
+)
+
+_state = threading.local()
+_lock = threading.Lock()
+_views = defaultdict(lambda: {
+    'count': 0,
+    'buckets': [0] * len(BUCKETS),
+    **dict.fromkeys(SUMS, 0),
+})
+# Шаблоны и include: число рендерингов и время с вложенными шаблонами.
+_renders = defaultdict(lambda: [0, 0.0])
+
+
+class Recorder:
+    """Замеры одного HTTP-запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_seconds = 0.0
+        self.renders = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (time.perf_counter() - started, context['connection'].alias,
+                 sql)
+            )
+
+    def summary(self, response):
+        return {
+            'request_seconds': time.perf_counter() - self.started,
+            'db_queries': len(self.queries),
+            'db_seconds': sum(duration for duration, _, _ in self.queries),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_seconds': self.template_seconds,
+            'response_bytes': (
+                0 if response.streaming else len(response.content)
+            ),
+        }
+
+    def top_queries(self):
+        return [
+            {
+                'seconds': round(duration, 6),
+                'database': alias,
+                'sql': sql[:SQL_PREVIEW],
+            }
+            for duration, alias, sql in sorted(
+                self.queries, reverse=True, key=lambda query: query[0]
+            )[:TOP_QUERIES]
+        ]
+
+    def top_renders(self):
+        return [
+            {'template': name, 'renders': count, 'seconds': round(seconds, 6)}
+            for name, (count, seconds) in sorted(
+                self.renders.items(), reverse=True,
+                key=lambda item: item[1][1],
+            )[:TOP_QUERIES]
+        ]
+
+
+def current():
+    return getattr(_state, 'recorder', None)
+
+
+def record_cache(hit):
+    recorder = current()
+    if recorder is None:
+        return
+    if hit:
+        recorder.cache_hits += 1
+    else:
+        recorder.cache_misses += 1
+
+
+def record_template(seconds):
+    recorder = current()
+    if recorder is not None:
+        recorder.template_seconds += seconds
+
+
+def record_render(name, seconds):
+    """Время одного шаблона, include или тяжёлого тега."""
+    recorder = current()
+    if recorder is not None:
+        render = recorder.renders[name]
+        render[0] += 1
+        render[1] += seconds
+
+
+def observe(view_name, summary, renders=None):
+    with _lock:
+        stats = _views[view_name]
+        stats['count'] += 1
+        for key in SUMS:
+            stats[key] += summary[key]
+        for index, bound in enumerate(BUCKETS):
+            if summary['request_seconds'] <= bound:
+                stats['buckets'][index] += 1
+        for name, (count, seconds) in (renders or {}).items():
+            _renders[name][0] += count
+            _renders[name][1] += seconds
+
+
+def reset():
+    with _lock:
+        _views.clear()
+        _renders.clear()
+
+
+def _labels(labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('"', '\\"'))
+        for key, value in labels
+    )
+
+
+def _metric(lines, name, kind, help_text, samples):
+    """samples — тройки (суффикс имени, метки, значение)."""
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for suffix, labels, value in samples:
+        lines.append(f'{name}{suffix}{{{_labels(labels)}}} {value}')
+
+
+def render_prometheus():
+    """Все счётчики в текстовом формате Prometheus."""
+    from .cache import metrics as cache_metrics
+
+    with _lock:
+        views = {name: dict(stats) for name, stats in _views.items()}
+        renders = {name: tuple(render) for name, render in _renders.items()}
+    lines = []
+    histogram = []
+    for view, stats in views.items():
+        for bound, value in zip(BUCKETS, stats['buckets']):
+            histogram.append(
+                ('_bucket', (('view', view), ('le', bound)), value))
+        histogram += [
+            ('_bucket', (('view', view), ('le', '+Inf')), stats['count']),
+            ('_sum', (('view', view),), round(stats['request_seconds'], 6)),
+            ('_count', (('view', view),), stats['count']),
+        ]
+    _metric(lines, 'yatube_request_seconds', 'histogram',
+            'Wall time of requests by view.', histogram)
+    for key in SUMS[1:]:
+        _metric(lines, f'yatube_{key}_total', 'counter',
+                f'Sum of {key.replace("_", " ")} over requests by view.',
+                [('', (('view', view),), round(stats[key], 6))
+                 for view, stats in views.items()])
+    _metric(lines, 'yatube_cache_events_total', 'counter',
+            'get_or_compute events by cache name.',
+            [('', (('name', name), ('event', event)), value)
+             for name, events in cache_metrics().items()
+             for event, value in events.items()])
+    _metric(lines, 'yatube_template_renders_total', 'counter',
+            'Renders of templates, includes and heavy tags.',
+            [('', (('template', name),), count)
+             for name, (count, _) in renders.items()])
+    _metric(lines, 'yatube_template_render_seconds_total', 'counter',
+            'Render time of templates including nested ones.',
+            [('', (('template', name),), round(seconds, 6))
+             for name, (_, seconds) in renders.items()])
+    return '\n'.join(lines) + '\n'
+
+
+class PerformanceMiddleware:
+    """Замеряет каждый запрос и пишет в лог медленные.
+
+    Порог задаётся SLOW_REQUEST_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = _state.recorder = Recorder()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(recorder)
+                    )
+                response = self.get_response(request)
+        finally:
+            _state.recorder = None
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        summary = recorder.summary(response)
+        observe(view_name, summary, recorder.renders)
+        if summary['request_seconds'] >= settings.SLOW_REQUEST_SECONDS:
+            logger.warning('slow request %s', json.dumps({
+                'view': view_name,
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                **{key: round(value, 6) for key, value in summary.items()},
+                'top_queries': recorder.top_queries(),
+                'top_templates': recorder.top_renders(),
+            }, ensure_ascii=False))
+        return response
@@ -0,0 +1,191 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# Пропуск в ряду номеров страниц.
+ELLIPSIS = '…'
+
+
+def encode_cursor(direction, position):
+    """Упаковывает направление и позицию (дата, pk) в непрозрачный токен."""
+    value, pk = position
+    raw = f'{direction}|{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора. Для испорченного токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        return None
+    return direction, (value, pk)
+
+
+def split_key(key):
+    """Ключ курсора: поле или пара (поле, поле для равных значений).
+
+    Второе поле по умолчанию pk. Другое нужно, когда индекс хранит
+    тот же id в своей колонке, например post_id у записи ленты.
+    """
+    if isinstance(key, str):
+        return key, 'pk'
+    return tuple(key)
+
+
+class WindowPaginator(Paginator):
+    """Пагинатор, который выводит не все номера страниц, а окно.
+
+    У страницы есть window: номера вокруг текущей, первые и последние,
+    а между ними ELLIPSIS. Для огромных таблиц count можно задать
+    оценкой, тогда COUNT(*) не выполняется; estimated отмечает, что
+    число страниц приблизительное.
+    """
+
+    ELLIPSIS = ELLIPSIS
+    on_each_side = 2
+    on_ends = 1
+
+    def __init__(self, object_list, per_page, count=None, estimated=False,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            # Готовый счётчик избавляет от запроса COUNT(*).
+            self.count = count
+        self.estimated = estimated
+
+    def page_window(self, number):
+        """Номера страниц вокруг number; пропуски отмечены ELLIPSIS.
+
+        Тот же ряд, что get_elided_page_range из Django 3.2.
+        """
+        last = self.num_pages
+        if last <= (self.on_each_side + self.on_ends) * 2:
+            return list(self.page_range)
+        if number > self.on_each_side + self.on_ends + 2:
+            window = [*range(1, self.on_ends + 1), ELLIPSIS]
+            window += range(number - self.on_each_side, number + 1)
+        else:
+            window = list(range(1, number + 1))
+        if number < last - self.on_each_side - self.on_ends - 1:
+            window += range(number + 1, number + self.on_each_side + 1)
+            window += [ELLIPSIS, *range(last - self.on_ends + 1, last + 1)]
+        else:
+            window += range(number + 1, last + 1)
+        return window
+
+    def _get_page(self, *args, **kwargs):
+        page = super()._get_page(*args, **kwargs)
+        page.window = self.page_window(page.number)
+        return page
+
+
+class CursorPage(Page):
+    """Страница, полученная по курсору. Номера нет, COUNT(*) не нужен."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<CursorPage of %s>' % len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+
+class CursorPaginator(WindowPaginator):
+    """Пагинатор по ключу (key, pk) вместо LIMIT/OFFSET.
+
+    Обычные страницы (?page=N) работают как раньше, а переход по
+    ссылкам «вперёд/назад» идёт по курсору и не зависит от глубины.
+    key — поле или пара полей, см. split_key.
+    """
+
+    def __init__(self, object_list, per_page, key='pub_date', **kwargs):
+        self.key, self.tiebreaker = split_key(key)
+        object_list = object_list.order_by(
+            f'-{self.key}', f'-{self.tiebreaker}'
+        )
+        super().__init__(object_list, per_page, **kwargs)
+
+    def position(self, obj):
+        return getattr(obj, self.key), getattr(obj, self.tiebreaker)
+
+    def cursor(self, direction, obj):
+        return encode_cursor(direction, self.position(obj))
+
+    def seek(self, direction, position):
+        """Объекты после позиции (NEXT) или перед ней (PREVIOUS)."""
+        # Внешнее нестрогое условие по ключу даёт базе диапазон по индексу,
+        # а OR внутри только отсекает строки с тем же ключом.
+        value, pk = position
+        if direction == NEXT:
+            return self.object_list.filter(
+                Q(**{f'{self.key}__lte': value}),
+                Q(**{f'{self.key}__lt': value})
+                | Q(**{f'{self.tiebreaker}__lt': pk}),
+            )
+        return self.object_list.filter(
+            Q(**{f'{self.key}__gte': value}),
+            Q(**{f'{self.key}__gt': value})
+            | Q(**{f'{self.tiebreaker}__gt': pk}),
+        ).reverse()
+
+    def get_cursor_page(self, token):
+        """Возвращает страницу по токену; битый токен ведёт на первую."""
+        cursor = decode_cursor(token)
+        if cursor is None:
+            return self.get_page(1)
+        page = self.seek_page(*cursor)
+        if not page.object_list:
+            return self.get_page(1)
+        return page
+
+    def seek_page(self, direction, position):
+        """Страница после позиции или перед ней; может быть пустой."""
+        rows = list(self.seek(direction, position)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == NEXT:
+            page = CursorPage(rows, self, has_more, True)
+        else:
+            rows.reverse()
+            page = CursorPage(rows, self, True, has_more)
+        return self._with_cursors(page)
+
+    def first_page(self):
+        """Первая страница без COUNT(*): о следующей говорит лишняя строка."""
+        rows = list(self.object_list[:self.per_page + 1])
+        page = CursorPage(
+            rows[:self.per_page], self, len(rows) > self.per_page, False
+        )
+        return self._with_cursors(page)
+
+    def _get_page(self, *args, **kwargs):
+        return self._with_cursors(super()._get_page(*args, **kwargs))
+
+    def _with_cursors(self, page):
+        page.next_cursor = page.previous_cursor = None
+        if not page.object_list:
+            return page
+        if page.has_next():
+            page.next_cursor = self.cursor(NEXT, page[len(page) - 1])
+        if page.has_previous():
+            page.previous_cursor = self.cursor(PREVIOUS, page[0])
+        return page
@@ -0,0 +1,93 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .thumbnails import image_ready
+
+try:
+    # AVIF в Pillow появляется только с этим плагином.
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+CACHE_PREFIX = 'renditions:'
+EXTENSIONS = {'AVIF': 'avif', 'WEBP': 'webp', 'JPEG': 'jpg'}
+MIME_TYPES = {'AVIF': 'image/avif', 'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+
+
+def supported_formats():
+    """Форматы из RENDITION_FORMATS, которые умеет сохранять Pillow."""
+    return [
+        image_format for image_format in settings.RENDITION_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def rendition_name(name, width, image_format):
+    stem = os.path.splitext(name)[0]
+    return f'{stem}.{width}w.{EXTENSIONS[image_format]}'
+
+
+def rendition_size(width):
+    ratio_width, ratio_height = settings.RENDITION_RATIO
+    return width, round(width * ratio_height / ratio_width)
+
+
+def expected(name):
+    """Все версии картинки: список (формат, ширина, имя файла)."""
+    return [
+        (image_format, width, rendition_name(name, width, image_format))
+        for image_format in supported_formats()
+        for width in settings.RENDITION_WIDTHS
+    ]
+
+
+def make_renditions(name):
+    """Нарезает картинку по всем ширинам и форматам рядом с оригиналом."""
+    with default_storage.open(name) as source_file:
+        source = Image.open(source_file)
+        source.load()
+    source = ImageOps.exif_transpose(source).convert('RGB')
+    for image_format, width, target in expected(name):
+        image = ImageOps.fit(source, rendition_size(width), Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(
+            buffer,
+            image_format,
+            quality=settings.RENDITION_QUALITY,
+        )
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(buffer.getvalue()))
+    cache.set(CACHE_PREFIX + name, True, None)
+    image_ready.send(sender=name)
+
+
+def is_ready(name):
+    """Готовы ли все версии картинки. Результат запоминается в кэше."""
+    if cache.get(CACHE_PREFIX + name):
+        return True
+    ready = all(
+        default_storage.exists(target) for _, _, target in expected(name)
+    )
+    if ready:
+        cache.set(CACHE_PREFIX + name, True, None)
+    return ready
+
+
+def srcsets(name):
+    """Для готовой картинки: список (MIME-тип, значение srcset)."""
+    result = []
+    for image_format in supported_formats():
+        candidates = ', '.join(
+            f'{default_storage.url(rendition_name(name, width, image_format))}'
+            f' {width}w'
+            for width in settings.RENDITION_WIDTHS
+        )
+        result.append((MIME_TYPES[image_format], candidates))
+    return result
@@ -0,0 +1,78 @@
+import logging
+import os
+import time
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise
+)
+from django.template.utils import get_app_template_dirs
+
+from .instrumentation import record_template
+
+logger = logging.getLogger(__name__)
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+class TimedTemplate(Template):
+    """Шаблон, время рендеринга которого попадает в замеры запроса."""
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record_template(time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, которые замеряют рендеринг шаблонов верхнего уровня.
+
+    Вложенные шаблоны замеряет core.template_loaders.Loader. Опция
+    precompile: True разбирает все шаблоны при запуске, см. precompile().
+    """
+
+    def __init__(self, params):
+        params = params.copy()
+        params['OPTIONS'] = params.get('OPTIONS', {}).copy()
+        self.precompile_on_start = params['OPTIONS'].pop('precompile', False)
+        super().__init__(params)
+
+    def template_names(self):
+        """Имена всех шаблонов из DIRS и каталогов templates приложений."""
+        dirs = get_app_template_dirs('templates')
+        for directory in (*self.engine.dirs, *dirs):
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    if file_name.endswith(TEMPLATE_EXTENSIONS):
+                        yield os.path.relpath(
+                            os.path.join(root, file_name), directory
+                        ).replace(os.sep, '/')
+
+    def precompile(self):
+        """Загружает все шаблоны, чтобы кэширующий загрузчик их запомнил.
+
+        Возвращает число разобранных шаблонов. Шаблоны, которые не
+        разбираются (например, из чужих приложений без нужных тегов),
+        пропускаются с записью в лог.
+        """
+        compiled = 0
+        for name in set(self.template_names()):
+            try:
+                self.engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                logger.warning('Шаблон %s не разобран: %s', name, error)
+            else:
+                compiled += 1
+        return compiled
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,32 @@
+import time
+
+from django.template import Template
+from django.template.loaders import cached
+
+from .instrumentation import record_render
+
+
+class ProfiledTemplate(Template):
+    """Шаблон, который замеряет каждый свой рендеринг.
+
+    _render вызывают и render, и {% include %}, и {% extends %}, поэтому
+    замеры есть и у вложенных шаблонов; время включает вложенные.
+    """
+
+    def _render(self, context):
+        started = time.perf_counter()
+        try:
+            return super()._render(context)
+        finally:
+            record_render(self.name, time.perf_counter() - started)
+
+
+class Loader(cached.Loader):
+    """Кэширующий загрузчик, шаблоны которого замеряют рендеринг."""
+
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        # Шаблон собирает базовый загрузчик, поэтому класс меняется здесь;
+        # из кэша он приходит уже замеряющим.
+        template.__class__ = ProfiledTemplate
+        return template
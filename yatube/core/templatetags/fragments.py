@@ -0,0 +1,43 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from core.cache import get_or_compute
+
+register = template.Library()
+
+
+class FragmentCacheNode(CacheNode):
+    """Как {% cache %}, но пересчитывает фрагмент только один процесс."""
+
+    def render(self, context):
+        expire_time = int(self.expire_time_var.resolve(context))
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+            name=self.fragment_name,
+        )
+
+
+@register.tag('fragment_cache')
+def do_fragment_cache(parser, token):
+    """{% fragment_cache timeout name [var1 var2 ...] %}.
+
+    Закрывается {% endfragment_cache %}.
+    """
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(bit) for bit in tokens[3:]],
+        None,
+    )
@@ -0,0 +1,61 @@
+import logging
+import time
+
+from django import template
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+from sorl.thumbnail.shortcuts import get_thumbnail
+
+from core import renditions
+from core.instrumentation import record_render
+from core.thumbnails import enqueue
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+@register.simple_tag
+def picture(image, geometry='960x339', css_class='card-img my-2',
+            sizes=SIZES):
+    """Картинка поста: <picture> с srcset, пока версии не готовы — <img>.
+
+    Как и тег thumbnail из sorl, при ошибке ничего не выводит.
+    """
+    if not image:
+        return ''
+    started = time.perf_counter()
+    try:
+        return _picture(image, geometry, css_class, sizes)
+    except Exception:
+        logger.exception('Не удалось вывести картинку %s', image)
+        return ''
+    finally:
+        record_render('{% picture %}', time.perf_counter() - started)
+
+
+def _picture(image, geometry, css_class, sizes):
+    options = dict(settings.THUMBNAIL_PRESETS).get(geometry, {})
+    fallback = get_thumbnail(image, geometry, **options)
+    if not renditions.is_ready(image.name):
+        enqueue(renditions.make_renditions, image.name)
+        return format_html(
+            '<img class="{}" src="{}">', css_class, fallback.url
+        )
+    srcsets = renditions.srcsets(image.name)
+    img_srcset = dict(srcsets).pop('image/jpeg', '')
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime_type, srcset, sizes)
+            for mime_type, srcset in srcsets
+            if mime_type != 'image/jpeg'
+        ),
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}">'
+        '</picture>',
+        sources, css_class, fallback.url, img_srcset, sizes,
+    )
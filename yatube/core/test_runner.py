@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class LocalCacheRunner(DiscoverRunner):
+    """Запускает тесты с кэшем в памяти, какой бы кэш ни был настроен.
+
+    Иначе cache.clear() в тестах чистил бы общий кэш работающего сайта,
+    а ключи с id тестовой базы доставались бы другим процессам.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._local_cache = override_settings(
+            CACHES=settings.LOCMEM_CACHES, CACHE_SHARED=False
+        )
+        self._local_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._local_cache.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,54 @@
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import (
+    LOCAL_TIMEOUT, LOCK_SUFFIX, get_or_compute, metrics, reset_metrics,
+    shared_timeout
+)
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+
+    def test_computes_once(self):
+        """Значение считается один раз, дальше берётся из кэша."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'value'
+
+        for _ in range(3):
+            self.assertEqual(
+                get_or_compute('key', compute, 60, name='test'), 'value')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(metrics()['test'], {'misses': 1, 'hits': 2})
+
+    def test_stale_value_while_locked(self):
+        """Пока другой процесс пересчитывает, отдаётся старое значение."""
+        get_or_compute('key', lambda: 'old', 60)
+        cache.add('key' + LOCK_SUFFIX, 1)
+        value = get_or_compute('key', lambda: 'new', 60, beta=10 ** 9)
+        self.assertEqual(value, 'old')
+
+    def test_early_refresh(self):
+        """При большом beta значение обновляется до истечения срока."""
+        get_or_compute('key', lambda: time.sleep(0.01) or 'old', 60)
+        value = get_or_compute('key', lambda: 'new', 60, beta=10 ** 9)
+        self.assertEqual(value, 'new')
+
+
+class SharedTimeoutTests(SimpleTestCase):
+    def test_local_cache_shortens_timeouts(self):
+        """Кэш процесса держит общие ключи не дольше LOCAL_TIMEOUT."""
+        with override_settings(CACHE_SHARED=False):
+            self.assertEqual(shared_timeout(3600), LOCAL_TIMEOUT)
+            self.assertEqual(shared_timeout(None), LOCAL_TIMEOUT)
+            self.assertEqual(shared_timeout(5), 5)
+        with override_settings(CACHE_SHARED=True):
+            self.assertEqual(shared_timeout(3600), 3600)
+            self.assertIsNone(shared_timeout(None))
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.db import (
+    STICKY_COOKIE, PrimaryReplicaRouter, estimated_count, pin_to_primary,
+    unpin
+)
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class RouterTests(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.addCleanup(unpin)
+
+    def test_reads_go_to_replica(self):
+        """Чтение идёт на реплику, запись — в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        """После привязки чтение идёт в основную базу."""
+        pin_to_primary()
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+class StickinessTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='UserTest')
+        cls.author = User.objects.create_user(username='Author')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_sets_sticky_cookie(self):
+        """Запись, в том числе подписка по GET, ставит cookie привязки."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        response = self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'Author'}))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'text'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+
+class EstimatedCountTests(TestCase):
+    def test_estimate_from_statistics(self):
+        """Оценка берётся из статистики и только для больших таблиц."""
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=author, text='Текст') for _ in range(5)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_count(Post, min_rows=1), 5)
+        self.assertIsNone(estimated_count(Post))
@@ -0,0 +1,81 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import instrumentation
+from posts.models import Post
+
+User = get_user_model()
+
+PRODUCTION_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+PRODUCTION_TEMPLATES[0]['APP_DIRS'] = False
+PRODUCTION_TEMPLATES[0]['OPTIONS'].update(
+    loaders=[('core.template_loaders.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ])],
+    precompile=True,
+)
+
+
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def test_metrics_by_view(self):
+        """Запрос попадает в счётчики своего view."""
+        self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_request_seconds_count{view="posts:post_detail"} 1',
+            metrics)
+        self.assertRegex(
+            metrics, r'yatube_db_queries_total\{view="posts:post_detail"\} '
+                     r'[1-9]')
+        self.assertRegex(
+            metrics, r'yatube_response_bytes_total'
+                     r'\{view="posts:post_detail"\} [1-9]')
+        self.assertIn('yatube_template_seconds_total', metrics)
+
+    def test_metrics_forbidden_outside(self):
+        """Снаружи счётчики недоступны."""
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(SLOW_REQUEST_SECONDS=0)
+    def test_slow_request_logged(self):
+        """Медленный запрос пишется в лог вместе с SQL."""
+        with self.assertLogs('yatube.performance', 'WARNING') as logs:
+            self.client.get(reverse('posts:profile',
+                                    kwargs={'username': 'author'}))
+        self.assertIn('"view": "posts:profile"', logs.output[0])
+        self.assertIn('top_queries', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    @override_settings(TEMPLATES=PRODUCTION_TEMPLATES)
+    def test_precompiled_templates_profiled(self):
+        """Шаблоны разобраны заранее, include замеряются по отдельности."""
+        backend = engines.all()[0]
+        self.assertGreater(backend.precompile(), 0)
+        loader = backend.engine.template_loaders[0]
+        self.assertIn('posts/includes/post_card.html',
+                      loader.get_template_cache)
+        self.client.get(reverse('posts:index'))
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        for name in ('posts/index.html', 'base.html',
+                     'posts/includes/post_card.html',
+                     'posts/includes/paginator.html'):
+            self.assertIn(
+                f'yatube_template_renders_total{{template="{name}"}} 1',
+                metrics)
@@ -0,0 +1,152 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.dispatch import Signal
+from django.templatetags.static import static
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.images import DummyImageFile, ImageFile
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_backlog = deque()
+_lock = threading.Lock()
+
+# Отправляется, когда готова миниатюра или версии картинки;
+# sender — имя исходного файла.
+image_ready = Signal()
+
+
+class PlaceholderImageFile(DummyImageFile):
+    """Заглушка, которую отдаём, пока миниатюра готовится в фоне."""
+
+    @property
+    def url(self):
+        return static(settings.THUMBNAIL_PLACEHOLDER)
+
+
+class BackgroundThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который никогда не ресайзит картинку в запросе.
+
+    Готовая миниатюра берётся из key-value хранилища sorl, а если её
+    ещё нет, генерация уходит в фоновый поток и в шаблон попадает
+    заглушка.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        thumbnail = self.cached_thumbnail(file_, geometry_string, options)
+        if thumbnail:
+            return thumbnail
+        schedule(str(file_), geometry_string, options)
+        return PlaceholderImageFile(geometry_string)
+
+    def cached_thumbnail(self, file_, geometry_string, options):
+        source = ImageFile(file_)
+        options = self.prepare_options(source, dict(options))
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+    def prepare_options(self, source, options):
+        # Повторяет подготовку опций из ThumbnailBackend.get_thumbnail,
+        # чтобы имя миниатюры совпадало с тем, что создаст генерация.
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def generate(self, file_, geometry_string, **options):
+        """Создаёт миниатюру синхронно, как обычный бэкенд sorl."""
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+
+def _executor_instance():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def _run(job):
+    func, args = job
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновое задание %s%r упало', func.__name__, args)
+    finally:
+        with _lock:
+            _pending.discard(job)
+
+
+def _run_in_worker(job):
+    try:
+        _run(job)
+    finally:
+        connection.close()
+
+
+def enqueue(func, *args):
+    """Ставит задание func(*args) в очередь, если его там ещё нет.
+
+    При THUMBNAIL_WORKERS = 0 фоновых потоков нет: задания копятся
+    в очереди до вызова drain().
+    """
+    job = (func, args)
+    with _lock:
+        if job in _pending:
+            return None
+        _pending.add(job)
+        if not settings.THUMBNAIL_WORKERS:
+            _backlog.append(job)
+            return None
+    return _executor_instance().submit(_run_in_worker, job)
+
+
+def drain():
+    """Синхронно выполняет все задания, накопленные в очереди."""
+    while True:
+        with _lock:
+            if not _backlog:
+                return
+            job = _backlog.popleft()
+        _run(job)
+
+
+def _make_thumbnail(name, geometry_string, options):
+    BackgroundThumbnailBackend().generate(
+        name, geometry_string, **dict(options)
+    )
+    image_ready.send(sender=name)
+
+
+def schedule(name, geometry_string, options):
+    """Ставит миниатюру в очередь фоновой генерации."""
+    options = tuple(sorted(options.items()))
+    return enqueue(_make_thumbnail, name, geometry_string, options)
+
+
+def pregenerate(image):
+    """Готовит миниатюры THUMBNAIL_PRESETS и адаптивные версии картинки."""
+    from .renditions import make_renditions
+
+    if not image:
+        return
+    for geometry_string, options in settings.THUMBNAIL_PRESETS:
+        schedule(image.name, geometry_string, options)
+    enqueue(make_renditions, image.name)
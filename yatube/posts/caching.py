@@ -0,0 +1,121 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import shared_timeout
+
+from . import graph
+from .models import Group, Post, User
+
+FEED_VERSION_KEY = 'feed:version'
+FEED_MODIFIED_KEY = 'feed:modified'
+
+
+def feed_version():
+    """Текущая версия ленты. Входит в ключ кэша её фрагментов."""
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        # После вытеснения ключа начинаем с метки времени, чтобы не
+        # совпасть со старыми версиями, которые ещё лежат в кэше.
+        cache.add(
+            FEED_VERSION_KEY, int(time.time() * 1000), shared_timeout(None)
+        )
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def feed_modified():
+    """Время последнего изменения ленты."""
+    timestamp = cache.get(FEED_MODIFIED_KEY)
+    if timestamp is None:
+        # Не знаем, когда лента менялась: считаем, что только что.
+        cache.add(FEED_MODIFIED_KEY, time.time(), shared_timeout(None))
+        timestamp = cache.get(FEED_MODIFIED_KEY)
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def bump_feed_version():
+    """Делает устаревшими все закэшированные страницы ленты."""
+    cache.set(FEED_MODIFIED_KEY, time.time(), shared_timeout(None))
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        feed_version()
+
+
+# Валидаторы для django.views.decorators.http.condition. Считаются до
+# view и без шаблонов: версия ленты берётся из кэша, пост — одним
+# запросом. В ETag входит пользователь, так как шапка у всех своя, и
+# версия его подписок, так как от них зависят кнопки «Подписаться».
+
+def _source_exists(request, kwargs):
+    # Для несуществующей группы или автора валидаторы возвращают None:
+    # иначе condition ответит 304, не дойдя до 404 во view.
+    if not hasattr(request, '_source_exists'):
+        if 'slug' in kwargs:
+            source = Group.objects.filter(slug=kwargs['slug'])
+        elif 'username' in kwargs:
+            source = User.objects.filter(username=kwargs['username'])
+        else:
+            source = None
+        request._source_exists = source is None or source.exists()
+    return request._source_exists
+
+
+def feed_etag(request, *args, **kwargs):
+    if not _source_exists(request, kwargs):
+        return None
+    user_id = request.user.pk
+    if user_id is None:
+        return f'{feed_version()}-0'
+    return f'{feed_version()}-{user_id}-{graph.follow_version(user_id)}'
+
+
+def syndication_etag(request, *args, **kwargs):
+    if not _source_exists(request, kwargs):
+        return None
+    # Atom и RSS одинаковы для всех читателей.
+    return str(feed_version())
+
+
+def feed_last_modified(request, *args, **kwargs):
+    if not _source_exists(request, kwargs):
+        return None
+    return feed_modified()
+
+
+def _post_state(request, post_id):
+    # ETag и Last-Modified берутся из одной строки: запоминаем её.
+    if not hasattr(request, '_post_state'):
+        request._post_state = (
+            Post.objects.filter(pk=post_id)
+            .values_list('updated', 'author__stats__posts_count')
+            .first()
+        )
+    return request._post_state
+
+
+def _csrf_digest(request):
+    # Токен формы меняется вместе с cookie (например, при входе), и
+    # страница со старым токеном не должна отдаваться как 304.
+    token = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
+
+
+def post_etag(request, post_id):
+    state = _post_state(request, post_id)
+    if state is None:
+        return None
+    updated, posts_count = state
+    return (
+        f'{post_id}-{updated.timestamp()}-{posts_count}-'
+        f'{request.user.pk or 0}-{_csrf_digest(request)}'
+    )
+
+
+def post_last_modified(request, post_id):
+    state = _post_state(request, post_id)
+    return state[0] if state else None
@@ -0,0 +1,157 @@
+"""Очередь комментариев: запись в базу пачками из фонового потока.
+
+Комментарии сначала попадают в отдельный файл SQLite (COMMENT_QUEUE),
+запись в который не ждёт блокировки основной базы. Фоновый поток раз в
+COMMENT_FLUSH_SECONDS переносит их в базу одним bulk_create. Доставка
+«хотя бы один раз»: если процесс упадёт между записью пачки в базу и
+очисткой очереди, пачка запишется повторно.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import bump_feed_version
+from .counters import bump
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_lock = threading.Lock()
+_worker = None
+
+
+def enabled():
+    return bool(settings.COMMENT_QUEUE)
+
+
+def _queue():
+    """Соединение с файлом очереди, своё у каждого потока."""
+    path = settings.COMMENT_QUEUE
+    connections = _local.__dict__.setdefault('connections', {})
+    if path not in connections:
+        queue = sqlite3.connect(path, timeout=10, isolation_level=None)
+        queue.execute('PRAGMA journal_mode=WAL')
+        # Комментарий не теряется, даже если сразу после ответа
+        # пропадёт питание.
+        queue.execute('PRAGMA synchronous=FULL')
+        queue.execute(
+            'CREATE TABLE IF NOT EXISTS comments ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'post_id INTEGER NOT NULL, '
+            'author_id INTEGER NOT NULL, '
+            'text TEXT NOT NULL)'
+        )
+        connections[path] = queue
+    return connections[path]
+
+
+def enqueue(post_id, author_id, text):
+    """Ставит комментарий в очередь и будит фоновый поток."""
+    _queue().execute(
+        'INSERT INTO comments (post_id, author_id, text) VALUES (?, ?, ?)',
+        [post_id, author_id, text],
+    )
+    _start_worker()
+
+
+def pending():
+    """Сколько комментариев ждут записи в базу."""
+    return _queue().execute('SELECT COUNT(*) FROM comments').fetchone()[0]
+
+
+def flush(limit=None):
+    """Переносит в базу одну пачку из очереди; возвращает её размер.
+
+    Очередь заблокирована на время переноса, поэтому несколько
+    процессов не запишут одну пачку дважды. Комментарии к удалённым
+    постам и от удалённых пользователей отбрасываются.
+    """
+    queue = _queue()
+    queue.execute('BEGIN IMMEDIATE')
+    try:
+        rows = queue.execute(
+            'SELECT id, post_id, author_id, text FROM comments '
+            'ORDER BY id LIMIT ?',
+            [limit or settings.COMMENT_FLUSH_BATCH],
+        ).fetchall()
+        if rows:
+            _store(rows)
+            queue.execute(
+                'DELETE FROM comments WHERE id <= ?', [rows[-1][0]]
+            )
+        queue.execute('COMMIT')
+    except BaseException:
+        queue.execute('ROLLBACK')
+        raise
+    return len(rows)
+
+
+def _store(rows):
+    # Только что созданного поста на реплике может ещё не быть, а поток
+    # очереди не закреплён за основной базой, как запросы после записи.
+    post_ids = set(Post.objects.using('default').filter(
+        pk__in={post_id for _, post_id, _, _ in rows}
+    ).values_list('pk', flat=True))
+    author_ids = set(User.objects.using('default').filter(
+        pk__in={author_id for _, _, author_id, _ in rows}
+    ).values_list('pk', flat=True))
+    comments = [
+        Comment(post_id=post_id, author_id=author_id, text=text)
+        for _, post_id, author_id, text in rows
+        if post_id in post_ids and author_id in author_ids
+    ]
+    if len(comments) < len(rows):
+        logger.warning(
+            'Отброшено комментариев без поста или автора: %s',
+            len(rows) - len(comments),
+        )
+    if not comments:
+        return
+    # bulk_create не вызывает сигналы: счётчики и версии обновляем здесь.
+    per_post = Counter(comment.post_id for comment in comments)
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        for post_id, count in per_post.items():
+            bump(Post, post_id, 'comments_count', count)
+        Post.objects.filter(pk__in=per_post).update(updated=timezone.now())
+    bump_feed_version()
+
+
+def drain():
+    """Сбрасывает очередь целиком; возвращает число комментариев."""
+    total = 0
+    while True:
+        flushed = flush()
+        if not flushed:
+            return total
+        total += flushed
+
+
+def _work():
+    while True:
+        time.sleep(settings.COMMENT_FLUSH_SECONDS)
+        try:
+            drain()
+        except Exception:
+            logger.exception('Не удалось сбросить очередь комментариев')
+        finally:
+            connection.close()
+
+
+def _start_worker():
+    global _worker
+    if not settings.COMMENT_FLUSH_SECONDS:
+        return
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_work, name='comment-queue', daemon=True
+            )
+            _worker.start()
@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import feed
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _guarded(queryset, field, delta):
+    # Счётчик без знака: не уходим ниже нуля даже при расхождении.
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def bump(model, pk, field, delta):
+    """Атомарно сдвигает счётчик field у строки model на delta."""
+    with transaction.atomic():
+        _guarded(model.objects.filter(pk=pk), field, delta)
+
+
+def bump_user(user_id, field, delta):
+    """То же для UserStats; недостающая строка пересчитывается с нуля."""
+    with transaction.atomic():
+        updated = _guarded(
+            UserStats.objects.filter(user_id=user_id), field, delta
+        )
+        if not updated and delta > 0:
+            UserStats.objects.get_or_create(
+                user_id=user_id, defaults=actual_user_stats(user_id)
+            )
+
+
+def bump_users(user_ids, field, delta):
+    """bump_user для многих пользователей одним UPDATE."""
+    user_ids = set(user_ids)
+    with transaction.atomic():
+        updated = _guarded(
+            UserStats.objects.filter(user_id__in=user_ids), field, delta
+        )
+        if updated < len(user_ids) and delta > 0:
+            present = UserStats.objects.filter(
+                user_id__in=user_ids
+            ).values_list('user_id', flat=True)
+            for user_id in user_ids - set(present):
+                UserStats.objects.get_or_create(
+                    user_id=user_id, defaults=actual_user_stats(user_id)
+                )
+
+
+def actual_user_stats(user_id):
+    return {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def _count_of(model, fk):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+# Модель со счётчиками -> {поле счётчика: (модель, внешний ключ)}.
+COUNTERS = {
+    Group: {'posts_count': (Post, 'group')},
+    Post: {'comments_count': (Comment, 'post')},
+    UserStats: {
+        'posts_count': (Post, 'author'),
+        'followers_count': (Follow, 'author'),
+        'following_count': (Follow, 'user'),
+    },
+}
+
+
+def recount(dry_run=False):
+    """Пересчитывает все счётчики пачкой UPDATE-запросов.
+
+    Возвращает число строк с расхождением для каждого счётчика.
+    """
+    drift = {}
+    with transaction.atomic():
+        missing = User.objects.filter(stats__isnull=True).values_list(
+            'pk', flat=True
+        )
+        if not dry_run:
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=pk) for pk in missing.iterator()],
+                ignore_conflicts=True,
+            )
+        for model, fields in COUNTERS.items():
+            for field, (source, fk) in fields.items():
+                stale = model.objects.annotate(
+                    actual=_count_of(source, fk)
+                ).exclude(**{field: F('actual')})
+                label = f'{model.__name__}.{field}'
+                drift[label] = stale.count()
+                if drift[label] and not dry_run:
+                    model.objects.filter(
+                        pk__in=stale.values('pk')
+                    ).update(**{field: _count_of(source, fk)})
+        if not dry_run:
+            feed.mark_pulled()
+    return drift
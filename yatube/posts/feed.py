@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.db.models import F, Q
+
+from core.cache import get_or_compute, shared_timeout
+
+from . import graph
+from .models import FeedItem, Follow, Post, UserStats
+
+# Авторы с большим числом подписчиков не раскладывают посты по лентам,
+# их посты подмешиваются в ленту при чтении.
+FANOUT_LIMIT = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+BACKFILL_SIZE = 500
+HEAVY_AUTHORS_KEY = 'feed:heavy_authors'
+HEAVY_AUTHORS_TIMEOUT = 300
+
+
+def mark_pulled(author_ids=None):
+    """Отмечает авторов, у которых подписчиков стало больше FANOUT_LIMIT.
+
+    Вызывается там, где меняется followers_count, до того как автор
+    попадёт в heavy_authors и fan_out начнёт его пропускать. Флаг не
+    снимается, поэтому неразложенные посты остаются в лентах и после
+    того, как подписчиков станет меньше. Без author_ids проверяет всех.
+    """
+    stats = UserStats.objects.filter(
+        followers_count__gt=FANOUT_LIMIT, feed_pulled=False
+    )
+    if author_ids is not None:
+        stats = stats.filter(user_id__in=author_ids)
+    if stats.update(feed_pulled=True):
+        cache.delete(HEAVY_AUTHORS_KEY)
+
+
+def heavy_authors():
+    """Множество id авторов, посты которых читаются без раскладки.
+
+    Это те, у кого подписчиков больше FANOUT_LIMIT сейчас или было
+    раньше, см. mark_pulled.
+    """
+    return get_or_compute(
+        HEAVY_AUTHORS_KEY,
+        lambda: set(
+            UserStats.objects.filter(feed_pulled=True)
+            .values_list('user_id', flat=True)
+        ),
+        shared_timeout(HEAVY_AUTHORS_TIMEOUT),
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id in heavy_authors():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if author_id in heavy_authors():
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    )[:BACKFILL_SIZE]
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    FeedItem.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def fanned_out_feed(user):
+    """Лента только из разложенных постов; идёт по индексу FeedItem.
+
+    Равные даты различает post_id записи ленты: так порядок совпадает с
+    индексом (user, -pub_date, -post) и досортировка не нужна.
+    """
+    post_list = Post.objects.filter(feed_items__user=user).annotate(
+        feed_date=F('feed_items__pub_date'),
+        feed_post=F('feed_items__post'),
+    )
+    return post_list, ('feed_date', 'feed_post')
+
+
+def follow_feed(user):
+    """Возвращает ленту подписок и поле, по которому её листать."""
+    heavy = heavy_authors()
+    pulled = heavy and [
+        author_id for author_id in graph.following_of(user.pk)
+        if author_id in heavy
+    ]
+    if not pulled:
+        return fanned_out_feed(user)
+    post_list = Post.objects.filter(
+        Q(pk__in=FeedItem.objects.filter(user=user).values('post'))
+        | Q(author_id__in=pulled)
+    )
+    return post_list, 'pub_date'
@@ -0,0 +1,91 @@
+"""Подписка и отписка сразу на многих авторов."""
+from django.db import IntegrityError, transaction
+
+from . import feed, graph
+from .counters import bump_user, bump_users
+from .models import Follow
+
+# Сколько авторов можно передать за один запрос.
+MAX_BULK_FOLLOWS = 100
+
+
+def _followed_ids(user, author_ids):
+    """Id авторов из author_ids, на которых пользователь подписан в базе.
+
+    Кэш графа может отставать, поэтому решение принимается по строкам
+    Follow внутри транзакции.
+    """
+    return set(
+        Follow.objects.select_for_update()
+        .filter(user=user, author_id__in=author_ids)
+        .values_list('author_id', flat=True)
+    )
+
+
+def _insert(user, author_ids):
+    """Вставляет подписки; возвращает id авторов реально вставленных строк."""
+    try:
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                [Follow(user=user, author_id=author_id)
+                 for author_id in author_ids]
+            )
+        return list(author_ids)
+    except IntegrityError:
+        pass
+    # Часть подписок появилась параллельно: вставляем по одной.
+    inserted = []
+    for author_id in author_ids:
+        try:
+            with transaction.atomic():
+                Follow.objects.bulk_create(
+                    [Follow(user=user, author_id=author_id)]
+                )
+        except IntegrityError:
+            continue
+        inserted.append(author_id)
+    return inserted
+
+
+def follow_many(user, authors):
+    """Подписывает пользователя на авторов одной пачкой.
+
+    bulk_create не вызывает сигналы, поэтому ленты, счётчики и граф
+    подписок обновляются здесь. Возвращает авторов, на которых
+    подписка действительно появилась.
+    """
+    by_id = {author.pk: author for author in authors if author.pk != user.pk}
+    if not by_id:
+        return []
+    with transaction.atomic():
+        existing = _followed_ids(user, by_id)
+        inserted = _insert(
+            user, [author_id for author_id in by_id
+                   if author_id not in existing]
+        )
+        if inserted:
+            bump_user(user.pk, 'following_count', len(inserted))
+            bump_users(inserted, 'followers_count', 1)
+            feed.mark_pulled(inserted)
+        for author_id in inserted:
+            feed.backfill(user.pk, author_id)
+    for author_id in inserted:
+        graph.add_follow(user.pk, author_id)
+    return [by_id[author_id] for author_id in inserted]
+
+
+def unfollow_many(user, authors):
+    """Отписывает пользователя от авторов одной транзакцией.
+
+    Удаление идёт через QuerySet.delete(), и ленты, счётчики и граф
+    правят обычные сигналы post_delete. Возвращает авторов, от которых
+    пользователь отписался.
+    """
+    by_id = {author.pk: author for author in authors}
+    with transaction.atomic():
+        followed = _followed_ids(user, by_id)
+        if followed:
+            Follow.objects.filter(
+                user=user, author_id__in=followed
+            ).delete()
+    return [by_id[author_id] for author_id in followed]
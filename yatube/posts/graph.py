@@ -0,0 +1,160 @@
+"""Граф подписок: отсортированные массивы id для каждого пользователя.
+
+Списки подписок и подписчиков читаются из базы при первом обращении и
+лежат в кэше как array('i'): 4 байта на связь. Вытесняет их сам кэш
+(MAX_ENTRIES, maxmemory у Redis), а подписка и отписка удаляют массивы
+обоих пользователей: следующее чтение загрузит их из базы заново.
+"""
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import shared_timeout
+
+from .models import Follow
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+# Колонка, по которой выбираются связи, и колонка с соседями.
+COLUMNS = {FOLLOWING: ('user_id', 'author_id'),
+           FOLLOWERS: ('author_id', 'user_id')}
+GRAPH_TIMEOUT = 3600
+# Сколько подписок пользователя смотреть, подбирая рекомендации.
+SUGGESTION_SOURCES = 200
+SUGGESTIONS = 10
+
+
+def _key(direction, user_id):
+    return f'graph:{direction}:{user_id}'
+
+
+def _load(direction, user_ids):
+    """Массивы соседей для нескольких пользователей: кэш, затем база."""
+    keys = {user_id: _key(direction, user_id) for user_id in user_ids}
+    cached = cache.get_many(keys.values())
+    result = {
+        user_id: cached[key]
+        for user_id, key in keys.items() if key in cached
+    }
+    missing = [user_id for user_id in keys if user_id not in result]
+    if missing:
+        column, neighbour = COLUMNS[direction]
+        loaded = {user_id: array('i') for user_id in missing}
+        rows = Follow.objects.filter(
+            **{f'{column}__in': missing}
+        ).order_by(column, neighbour).values_list(column, neighbour)
+        for user_id, neighbour_id in rows.iterator():
+            loaded[user_id].append(neighbour_id)
+        cache.set_many(
+            {keys[user_id]: ids for user_id, ids in loaded.items()},
+            shared_timeout(GRAPH_TIMEOUT),
+        )
+        result.update(loaded)
+    return result
+
+
+def following_of(user_id):
+    """Отсортированные id авторов, на которых подписан пользователь."""
+    return _load(FOLLOWING, [user_id])[user_id]
+
+
+def followers_of(user_id):
+    """Отсортированные id подписчиков автора."""
+    return _load(FOLLOWERS, [user_id])[user_id]
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user_id, author_id):
+    return _contains(following_of(user_id), author_id)
+
+
+def follow_states(user_id, author_ids):
+    """{id автора: подписан ли пользователь}; не больше одного запроса."""
+    following = following_of(user_id)
+    return {
+        author_id: _contains(following, author_id) for author_id in author_ids
+    }
+
+
+def follow_version(user_id):
+    """Меняется при каждой подписке и отписке пользователя.
+
+    Входит в ETag страниц, на которых видны кнопки подписки.
+    """
+    key = _key('version', user_id)
+    version = cache.get(key)
+    if version is None:
+        # Как у версии ленты: после вытеснения не совпадём со старой.
+        cache.add(key, int(time.time() * 1000), shared_timeout(None))
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(user_id):
+    try:
+        cache.incr(_key('version', user_id))
+    except ValueError:
+        follow_version(user_id)
+
+
+def mutual_follows(user_id):
+    """Id тех, с кем подписка взаимная, по возрастанию."""
+    following = following_of(user_id)
+    followers = followers_of(user_id)
+    # Слияние двух отсортированных массивов.
+    mutual = []
+    i = j = 0
+    while i < len(following) and j < len(followers):
+        if following[i] == followers[j]:
+            mutual.append(following[i])
+            i += 1
+            j += 1
+        elif following[i] < followers[j]:
+            i += 1
+        else:
+            j += 1
+    return mutual
+
+
+def suggestions(user_id, limit=SUGGESTIONS):
+    """На кого подписаны те, на кого подписан пользователь.
+
+    Кандидаты упорядочены по числу таких общих подписок.
+    """
+    following = following_of(user_id)
+    sources = list(following[:SUGGESTION_SOURCES])
+    votes = Counter()
+    for ids in _load(FOLLOWING, sources).values():
+        votes.update(
+            author_id for author_id in ids
+            if author_id != user_id and not _contains(following, author_id)
+        )
+    ranked = sorted(votes.items(), key=lambda item: (-item[1], item[0]))
+    return [author_id for author_id, _ in ranked[:limit]]
+
+
+def _invalidate(user_id, author_id):
+    keys = [_key(FOLLOWING, user_id), _key(FOLLOWERS, author_id)]
+    # Правка массива на месте теряла бы параллельные изменения. Второе
+    # удаление после коммита убирает массив, который успели загрузить
+    # из базы до коммита.
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def add_follow(user_id, author_id):
+    _invalidate(user_id, author_id)
+    _bump_version(user_id)
+
+
+def remove_follow(user_id, author_id):
+    _invalidate(user_id, author_id)
+    _bump_version(user_id)
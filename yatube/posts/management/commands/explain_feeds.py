@@ -0,0 +1,84 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.paginators import NEXT, CursorPaginator
+from posts.feed import fanned_out_feed
+from posts.models import Comment, Group, Post, User
+from posts.views import COUNT_COMMENTS, COUNT_POST, paginator_for
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (TABLE )?\S+$')
+# И полная сортировка, и досортировка «RIGHT PART OF ORDER BY».
+SQLITE_SORT = 'USE TEMP B-TREE'
+
+
+def feed_querysets():
+    """Запросы, которые выполняют страницы лент, с примерными данными."""
+    author = User.objects.first() or User(pk=1)
+    group = Group.objects.first() or Group(pk=1)
+    post = Post.objects.first() or Post(pk=1)
+    position = (timezone.now(), 0)
+    feeds = {
+        'index': (Post.objects.all(), 'pub_date'),
+        'group_posts': (Post.objects.filter(group=group), 'pub_date'),
+        'profile': (Post.objects.filter(author=author), 'pub_date'),
+        # Подмешивание постов популярных авторов сливает несколько
+        # источников и сортирует их; здесь проверяется разложенная лента.
+        'follow_index': fanned_out_feed(author),
+    }
+    querysets = {}
+    for name, (post_list, key) in feeds.items():
+        paginator = paginator_for(post_list, key)
+        querysets[name] = paginator.object_list[:COUNT_POST]
+        querysets[f'{name} (cursor)'] = paginator.seek(
+            NEXT, position)[:COUNT_POST + 1]
+    comments = CursorPaginator(
+        Comment.objects.filter(post=post).select_related('author'),
+        COUNT_COMMENTS, key='created',
+    )
+    querysets['post_detail comments'] = comments.object_list[:COUNT_COMMENTS]
+    return querysets
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN ' + sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    if connection.vendor == 'sqlite':
+        return [
+            line for line in plan
+            if SQLITE_FULL_SCAN.match(line) or SQLITE_SORT in line
+        ]
+    return [line for line in plan if 'Seq Scan' in line]
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы запросов лент и падает, '
+        'если какой-то из них читает таблицу целиком.'
+    )
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, queryset in feed_querysets().items():
+            plan = explain(queryset)
+            scans = full_scans(plan)
+            style = self.style.ERROR if scans else self.style.SUCCESS
+            self.stdout.write(style(name))
+            for line in plan:
+                self.stdout.write(f'    {line}')
+            if scans:
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                'Полный просмотр таблицы: ' + ', '.join(failed)
+            )
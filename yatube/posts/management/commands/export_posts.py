@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (
+    BATCH_SIZE, FORMATS, export_rows, guess_format, write_rows
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSONL или CSV, не загружая их все в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для выгрузки или «-».')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла. По умолчанию — по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        stream = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8', newline='')
+        )
+        started = time.monotonic()
+        rows = self.counted(export_rows(options['batch_size']))
+        try:
+            write_rows(stream, file_format, rows)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено: {self.total}, '
+            f'{self.total / elapsed if elapsed else 0:.0f} строк/с'
+        )
+
+    def counted(self, rows):
+        self.total = 0
+        for row in rows:
+            self.total += 1
+            yield row
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import comment_queue
+
+
+class Command(BaseCommand):
+    help = 'Записывает в базу все комментарии из очереди COMMENT_QUEUE.'
+
+    def handle(self, *args, **options):
+        if not comment_queue.enabled():
+            raise CommandError('Очередь комментариев не настроена.')
+        flushed = comment_queue.drain()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано комментариев: {flushed}.'
+        ))
@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from posts.transfer import (
+    BATCH_SIZE, FORMATS, Importer, guess_format, read_rows
+)
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты из JSONL или CSV пачками через bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами или «-» для stdin.')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла. По умолчанию — по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--images-from',
+            help='Каталог с картинками: пути в файле считаются от него, '
+                 'а картинки копируются в хранилище.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        importer = Importer(options['batch_size'], options['images_from'])
+        stream = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        try:
+            stats = importer.run(
+                read_rows(stream, file_format), self.progress
+            )
+        except DatabaseError as error:
+            raise CommandError(
+                f'Пачка после {importer.stats["imported"]} постов '
+                f'не загружена: {error}'
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {stats["imported"]}, пропущено: {stats["skipped"]}.'
+        ))
+
+    def progress(self, stats, rate):
+        self.stderr.write(
+            f'{stats["imported"]} постов, {rate:.0f} строк/с', ending='\r'
+        )
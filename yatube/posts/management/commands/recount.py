@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и чинит расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не менять.',
+        )
+
+    def handle(self, *args, **options):
+        drift = recount(dry_run=options['dry_run'])
+        for label, stale in drift.items():
+            self.stdout.write(f'{label}: {stale}')
+        if not any(drift.values()):
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import BATCH_SIZE, Seeder
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, подписками, '
+            'постами и комментариями. Один seed — одни и те же данные.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=2000000)
+        parser.add_argument(
+            '--follows', type=float, default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для популярности авторов, групп и постов.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Сколько картинок-заглушек создать в хранилище.',
+        )
+        parser.add_argument(
+            '--image-share', type=float, default=0.1,
+            help='Доля постов с картинкой, если картинки есть.',
+        )
+        parser.add_argument(
+            '--no-feed', action='store_false', dest='feed',
+            help='Не раскладывать посты по лентам подписчиков.',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 and (options['posts'] or options['comments']):
+            raise CommandError('Для постов и комментариев нужны авторы.')
+        seeder = Seeder(
+            options['seed'], options['skew'], options['batch_size'],
+            self.progress,
+        )
+        started = time.monotonic()
+        counts = seeder.run(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            images=options['images'],
+            image_share=options['image_share'],
+            feed=options['feed'],
+        )
+        self.stderr.write('')
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.0f} с.'
+        ))
+
+    def progress(self, model, rows, rate):
+        self.stderr.write(
+            f'{model._meta.verbose_name_plural}: {rows}, {rate:.0f} строк/с',
+            ending='\r',
+        )
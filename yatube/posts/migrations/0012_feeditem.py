@@ -0,0 +1,76 @@
+# Generated by Django 2.2.16 on 2026-10-17 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+# posts.feed.FANOUT_LIMIT и BACKFILL_SIZE на момент миграции.
+FANOUT_LIMIT = 1000
+BACKFILL_SIZE = 500
+
+
+def fill_feed(apps, schema_editor):
+    """Раскладывает посты так же, как backfill при подписке.
+
+    Авторов с подписчиками больше FANOUT_LIMIT пропускает: их посты
+    подмешиваются при чтении (флаг ставит 0019). Остальным берёт
+    последние BACKFILL_SIZE постов одним запросом на автора.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    FeedItem = apps.get_model('posts', 'FeedItem')
+    db = schema_editor.connection.alias
+    authors = (
+        Follow.objects.using(db).values('author')
+        .annotate(followers=Count('id'))
+        .filter(followers__lte=FANOUT_LIMIT)
+        .values_list('author', flat=True)
+    )
+    for author_id in authors:
+        posts = list(
+            Post.objects.using(db).filter(author_id=author_id)
+            .order_by('-pub_date').values_list('id', 'pub_date')
+            [:BACKFILL_SIZE]
+        )
+        followers = Follow.objects.using(db).filter(
+            author_id=author_id).values_list('user_id', flat=True)
+        FeedItem.objects.using(db).bulk_create(
+            [FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+             for user_id in followers
+             for post_id, pub_date in posts],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_auto_20221116_2221'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['user', '-pub_date'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique feed item'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
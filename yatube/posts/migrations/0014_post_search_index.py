@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from posts.search import backend
+from posts.stemmer import stem_words
+
+
+def create_index(apps, schema_editor):
+    if backend.vendor != schema_editor.connection.vendor:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.setup(cursor)
+    Post = apps.get_model('posts', 'Post')
+    if backend.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO posts_post_fts (rowid, body) VALUES (%s, %s)',
+                [(pk, ' '.join(stem_words(text)))
+                 for pk, text in Post.objects.using(
+                     schema_editor.connection.alias).values_list('pk', 'text')],
+            )
+
+
+def drop_index(apps, schema_editor):
+    if backend.vendor != schema_editor.connection.vendor:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.teardown(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
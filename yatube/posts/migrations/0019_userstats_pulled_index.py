@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-17 05:11
+
+from django.db import migrations, models
+
+# posts.feed.FANOUT_LIMIT на момент миграции.
+FANOUT_LIMIT = 1000
+
+
+def mark_pulled(apps, schema_editor):
+    # Посты этих авторов не раскладывались ни в 0012, ни при публикации.
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.using(schema_editor.connection.alias).filter(
+        followers_count__gt=FANOUT_LIMIT
+    ).update(feed_pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_userstats_feed_pulled'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(condition=models.Q(feed_pulled=True), fields=['user'], name='userstats_feed_pulled_idx'),
+        ),
+        migrations.RunPython(mark_pulled, migrations.RunPython.noop),
+    ]
@@ -26,9 +26,25 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Меняется при каждом сохранении; входит в ключ кэша карточки поста.
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('-pub_date',)
+        # Порядок как у курсорной пагинации, (-pub_date, -id): без id
+        # в индексе равные даты пришлось бы досортировывать.
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_id_idx'),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_id_idx'),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_id_idx'),
+        ]
 
     def __str__(self):
         return str(self.text)[:COUNT_SYMBOL]
@@ -38,6 +54,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -56,6 +73,11 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.text[:COUNT_SYMBOL]
@@ -82,3 +104,64 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author')),
                 name='do not selffollow'),
         ]
+        indexes = [
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Посты автора подмешиваются в ленты при чтении. Однажды поднятый
+    # флаг не сбрасывается: посты, написанные без раскладки, в лентах
+    # так и не появились.
+    feed_pulled = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('user',),
+                condition=models.Q(feed_pulled=True),
+                name='userstats_feed_pulled_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.user)
+
+
+class FeedItem(models.Model):
+    """Запись в ленте подписок: пост автора, на которого подписан user."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique feed item'),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='feed_user_pub_date_post_idx'),
+        ]
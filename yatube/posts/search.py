@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+from .stemmer import stem_words
+
+FTS_TABLE = 'posts_post_fts'
+# Сколько лучших совпадений ранжируем и отдаём в пагинацию.
+SEARCH_LIMIT = 1000
+
+
+class SQLiteFTSBackend:
+    """Поиск по таблице FTS5. В индекс кладутся основы слов."""
+
+    vendor = 'sqlite'
+
+    def setup(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            'USING fts5(body, tokenize="unicode61")'
+        )
+
+    def teardown(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def index(self, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [post_id, ' '.join(stem_words(text))],
+            )
+
+    def index_many(self, rows):
+        """Индексирует пачку (id поста, текст) двумя executemany."""
+        rows = [
+            (post_id, ' '.join(stem_words(text))) for post_id, text in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(post_id,) for post_id, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                rows,
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def match_expression(self, query):
+        # Каждую основу берём в кавычки: так пользовательский ввод не
+        # разбирается как синтаксис FTS5. «*» находит и другие окончания.
+        return ' '.join(f'"{word}"*' for word in stem_words(query))
+
+    def search(self, query):
+        """Возвращает id подходящих постов, лучшие совпадения первыми."""
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+                [expression, SEARCH_LIMIT],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend:
+    """Поиск по tsvector с русской конфигурацией PostgreSQL.
+
+    Индекс — GIN по выражению to_tsvector, его обновляет сама база.
+    """
+
+    vendor = 'postgresql'
+    config = 'russian'
+
+    def setup(self, cursor):
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS posts_post_text_fts_idx '
+            'ON posts_post USING GIN '
+            f"(to_tsvector('{self.config}'::regconfig, COALESCE(text, '')))"
+        )
+
+    def teardown(self, cursor):
+        cursor.execute('DROP INDEX IF EXISTS posts_post_text_fts_idx')
+
+    def index(self, post_id, text):
+        pass
+
+    def index_many(self, rows):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def search(self, query):
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, SearchVector
+        )
+        from .models import Post
+
+        search_query = SearchQuery(query, config=self.config)
+        vector = SearchVector('text', config=self.config)
+        return list(
+            Post.objects.annotate(
+                document=vector, rank=SearchRank(vector, search_query)
+            )
+            .filter(document=search_query)
+            .order_by('-rank', '-pub_date')
+            .values_list('pk', flat=True)[:SEARCH_LIMIT]
+        )
+
+
+backend = SimpleLazyObject(lambda: import_string(settings.SEARCH_BACKEND)())
@@ -0,0 +1,254 @@
+"""Быстрое заполнение базы синтетическими данными для профилирования."""
+import bisect
+import itertools
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from .caching import bump_feed_version
+from .counters import recount
+from .models import Comment, FeedItem, Follow, Group, Post, User, UserStats
+from .search import backend as search_backend
+from .transfer import chunks, explicit_dates, reset_sequences
+
+BATCH_SIZE = 10000
+# За сколько дней до запуска начинается история постов.
+HISTORY_DAYS = 365
+# Доля постов без группы.
+NO_GROUP_SHARE = 0.3
+VOCABULARY_SIZE = 3000
+
+
+class Zipf:
+    """Выбор id из диапазона по Ципфу: ранг r встречается как 1 / r ** skew.
+
+    Ранги перемешаны, чтобы популярными были не только первые id.
+    """
+
+    def __init__(self, rng, first_pk, size, skew):
+        self.rng = rng
+        self.first_pk = first_pk
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank ** skew for rank in range(1, size + 1)
+        ))
+        self.order = list(range(size))
+        rng.shuffle(self.order)
+
+    def __call__(self):
+        rank = bisect.bisect(
+            self.cum_weights, self.rng.random() * self.cum_weights[-1]
+        )
+        return self.first_pk + self.order[rank]
+
+
+class Seeder:
+    """Генерирует пользователей, группы, подписки, посты и комментарии.
+
+    Все id выдаются здесь же, поэтому связи известны без чтения из базы,
+    а строки вставляются через bulk_create большими пачками. Один и тот
+    же seed даёт одни и те же данные.
+    """
+
+    def __init__(self, seed=1, skew=1.1, batch_size=BATCH_SIZE,
+                 progress=None):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.skew = skew
+        self.batch_size = batch_size
+        self.progress = progress or (lambda model, rows, rate: None)
+        faker = Faker('ru_RU')
+        faker.seed_instance(seed)
+        # Faker медленный: берём у него словарь и имена один раз.
+        self.words = faker.words(VOCABULARY_SIZE, unique=False)
+        self.first_names = [faker.first_name() for _ in range(200)]
+        self.last_names = [faker.last_name() for _ in range(200)]
+        self.now = timezone.now()
+
+    def next_pk(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def sentence(self, low, high):
+        words = self.rng.choices(self.words, k=self.rng.randint(low, high))
+        return ' '.join(words).capitalize() + '.'
+
+    def zipf(self, first_pk, size):
+        return Zipf(self.rng, first_pk, size, self.skew)
+
+    def insert(self, model, rows):
+        """Вставляет строки генератора пачками; возвращает их число."""
+        total = 0
+        started = time.monotonic()
+        for batch in chunks(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                if model is Post:
+                    search_backend.index_many(
+                        (post.pk, post.text) for post in batch
+                    )
+            total += len(batch)
+            self.progress(
+                model, total, total / (time.monotonic() - started)
+            )
+        return total
+
+    def run(self, users, groups, posts, comments, follows, images=0,
+            image_share=0.0, feed=True):
+        counts = {}
+        user_pk, group_pk = self.next_pk(User), self.next_pk(Group)
+        post_pk = self.next_pk(Post)
+        counts['users'] = self.insert(User, self.users(user_pk, users))
+        counts['groups'] = self.insert(Group, self.groups(group_pk, groups))
+        counts['follows'] = self.insert(
+            Follow, self.follows(user_pk, users, follows)
+        )
+        image_names = self.images(images)
+        with explicit_dates(Post, Comment):
+            counts['posts'] = self.insert(Post, self.posts(
+                post_pk, posts, user_pk, users, group_pk, groups,
+                image_names, image_share,
+            ))
+            counts['comments'] = self.insert(Comment, self.comments(
+                post_pk, posts, user_pk, users, comments
+            ))
+        reset_sequences(User, Group, Post, Comment, Follow)
+        # recount обновляет followers_count и через feed.mark_pulled
+        # отмечает популярных авторов, сбрасывая их кэшированный список.
+        recount()
+        if feed:
+            counts['feed items'] = self.fill_feed(post_pk)
+        bump_feed_version()
+        return counts
+
+    def users(self, first_pk, size):
+        for number in range(size):
+            pk = first_pk + number
+            yield User(
+                pk=pk,
+                username=f'seed{self.seed}_{pk}',
+                password='!',
+                first_name=self.rng.choice(self.first_names),
+                last_name=self.rng.choice(self.last_names),
+                date_joined=self.now,
+            )
+
+    def groups(self, first_pk, size):
+        for number in range(size):
+            pk = first_pk + number
+            yield Group(
+                pk=pk,
+                title=self.sentence(1, 3)[:200],
+                slug=f'seed{self.seed}-{pk}',
+                description=self.sentence(5, 20),
+            )
+
+    def follows(self, first_pk, size, mean):
+        """У каждого свой размер подписок, авторы выбираются по Ципфу."""
+        if size < 2 or not mean:
+            return
+        pick_author = self.zipf(first_pk, size)
+        for number in range(size):
+            user_id = first_pk + number
+            count = min(
+                int(self.rng.expovariate(1 / mean)) + 1, size - 1
+            )
+            authors = set()
+            for _ in range(count * 2):
+                if len(authors) >= count:
+                    break
+                author_id = pick_author()
+                if author_id != user_id:
+                    authors.add(author_id)
+            for author_id in authors:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    def images(self, count):
+        names = []
+        for number in range(count):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (1280, 720), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/seed-{self.seed}-{number}.jpg',
+                ContentFile(buffer.getvalue()),
+            ))
+        return names
+
+    def post_date(self, number, size):
+        # Даты растут вместе с id и равномерно покрывают историю.
+        return self.now - timedelta(
+            days=HISTORY_DAYS * (size - number) / size
+        )
+
+    def posts(self, first_pk, size, user_pk, users, group_pk, groups,
+              image_names, image_share):
+        pick_author = self.zipf(user_pk, users)
+        pick_group = self.zipf(group_pk, groups) if groups else None
+        for number in range(size):
+            pub_date = self.post_date(number, size)
+            group_id = None
+            if groups and self.rng.random() >= NO_GROUP_SHARE:
+                group_id = pick_group()
+            image = ''
+            if image_names and self.rng.random() < image_share:
+                image = self.rng.choice(image_names)
+            yield Post(
+                pk=first_pk + number,
+                text=' '.join(
+                    self.sentence(4, 16)
+                    for _ in range(self.rng.randint(1, 6))
+                ),
+                author_id=pick_author(),
+                group_id=group_id,
+                image=image,
+                pub_date=pub_date,
+                created=pub_date,
+            )
+
+    def comments(self, post_pk, posts, user_pk, users, size):
+        if not posts:
+            return
+        pick_post = self.zipf(post_pk, posts)
+        for _ in range(size):
+            post_id = pick_post()
+            created = self.post_date(post_id - post_pk, posts) + timedelta(
+                minutes=self.rng.expovariate(1 / 60)
+            )
+            yield Comment(
+                post_id=post_id,
+                author_id=user_pk + self.rng.randrange(users),
+                text=self.sentence(2, 20),
+                pub_date=created,
+                created=created,
+            )
+
+    def fill_feed(self, first_post_pk):
+        """Раскладывает новые посты по лентам одним INSERT ... SELECT.
+
+        Как и fan_out, пропускает авторов из feed.heavy_authors: тех, у
+        кого отмечен UserStats.feed_pulled.
+        """
+        light_authors = UserStats.objects.filter(
+            feed_pulled=False
+        ).values('user')
+        authors_sql, params = light_authors.query.sql_with_params()
+        feed = FeedItem._meta.db_table
+        follow = Follow._meta.db_table
+        post = Post._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {feed} (user_id, post_id, pub_date) '
+                f'SELECT f.user_id, p.id, p.pub_date FROM {follow} f '
+                f'JOIN {post} p ON p.author_id = f.author_id '
+                f'WHERE p.id >= %s AND f.author_id IN ({authors_sql})',
+                [first_post_pk, *params],
+            )
+            return cursor.rowcount
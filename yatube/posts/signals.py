@@ -0,0 +1,125 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.thumbnails import image_ready
+
+from . import feed, graph
+from .caching import bump_feed_version
+from .counters import bump, bump_user
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .search import backend as search_backend
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+        graph.add_follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def unfollow_prune(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
+    graph.remove_follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+def feed_changed(sender, **kwargs):
+    bump_feed_version()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_touch_post(sender, instance, **kwargs):
+    # updated — версия страницы поста, от неё зависят ETag и кэш.
+    Post.objects.filter(pk=instance.post_id).update(updated=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def user_stats_create(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_group_remember(sender, instance, **kwargs):
+    instance._old_group_id = None
+    if instance.pk:
+        instance._old_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_counters_save(sender, instance, created, **kwargs):
+    if created:
+        bump_user(instance.author_id, 'posts_count', 1)
+    elif instance._old_group_id == instance.group_id:
+        return
+    elif instance._old_group_id:
+        bump(Group, instance._old_group_id, 'posts_count', -1)
+    if instance.group_id:
+        bump(Group, instance.group_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_counters_delete(sender, instance, **kwargs):
+    bump_user(instance.author_id, 'posts_count', -1)
+    if instance.group_id:
+        bump(Group, instance.group_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_counters_save(sender, instance, created, **kwargs):
+    if created:
+        bump(Post, instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_counters_delete(sender, instance, **kwargs):
+    bump(Post, instance.post_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_counters_save(sender, instance, created, **kwargs):
+    if created:
+        bump_user(instance.author_id, 'followers_count', 1)
+        bump_user(instance.user_id, 'following_count', 1)
+        feed.mark_pulled([instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_counters_delete(sender, instance, **kwargs):
+    bump_user(instance.author_id, 'followers_count', -1)
+    bump_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_search_index(sender, instance, **kwargs):
+    search_backend.index(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def post_search_remove(sender, instance, **kwargs):
+    search_backend.remove(instance.pk)
+
+
+@receiver(image_ready)
+def post_image_ready(sender, **kwargs):
+    # Карточки поста закэшированы с заглушкой вместо картинки:
+    # новое значение updated даёт им новый ключ.
+    if Post.objects.filter(image=sender).update(updated=timezone.now()):
+        bump_feed_version()
@@ -0,0 +1,117 @@
+"""Ленты Atom и RSS, которые отдаются потоком по мере чтения постов."""
+from io import StringIO
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import (
+    Atom1Feed, Rss201rev2Feed, SimplerXMLGenerator
+)
+from django.utils.text import Truncator
+
+from .caching import feed_modified, feed_version
+
+# Сколько последних постов попадает в ленту.
+FEED_SIZE = 50
+FEED_TIMEOUT = 3600
+ENCODING = 'utf-8'
+
+
+class StreamingFeedMixin:
+    """Пишет шапку ленты сразу, а записи — по одной из итератора."""
+
+    item_tag = 'item'
+
+    def latest_post_date(self):
+        return self.feed.get('updated') or super().latest_post_date()
+
+    def write_items(self, handler):
+        # Записи выводит stream(), здесь только запоминаем их место.
+        self.items_offset = self.buffer.tell()
+
+    def stream(self, items):
+        self.buffer = StringIO()
+        self.write(self.buffer, ENCODING)
+        document = self.buffer.getvalue()
+        yield document[:self.items_offset]
+        for item in items:
+            buffer = StringIO()
+            handler = SimplerXMLGenerator(buffer, ENCODING)
+            handler.startElement(self.item_tag, self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_tag)
+            yield buffer.getvalue()
+        yield document[self.items_offset:]
+
+
+class AtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_tag = 'entry'
+
+
+class RssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    pass
+
+
+FEED_TYPES = {'atom': AtomFeed, 'rss': RssFeed}
+
+
+def post_items(request, feed, post_list):
+    """Записи ленты; посты читаются из базы через .iterator()."""
+    posts = post_list.select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    )[:FEED_SIZE]
+    for post in posts.iterator():
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        feed.add_item(
+            title=Truncator(post.text).words(10),
+            link=link,
+            description=post.text,
+            author_name=post.author.get_full_name() or post.author.username,
+            pubdate=post.pub_date,
+            updateddate=post.updated,
+            unique_id=link,
+            categories=[post.group.title] if post.group else (),
+        )
+        # add_item только собирает словарь записи, копить их не нужно.
+        yield feed.items.pop()
+
+
+def _store_when_done(key, chunks):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts), FEED_TIMEOUT)
+
+
+def feed_response(request, feed_type, source):
+    """Лента из кэша текущей версии или потоком из базы.
+
+    source() возвращает заголовок, ссылку на страницу и посты; его
+    вызывают только при промахе кэша.
+    """
+    feed_class = FEED_TYPES[feed_type]
+    key = (
+        f'syndication:{feed_version()}:{request.get_host()}:'
+        f'{request.path}'
+    )
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content, content_type=feed_class.content_type)
+    title, link, post_list = source()
+    feed = feed_class(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=title,
+        feed_url=request.build_absolute_uri(),
+        language='ru',
+        updated=feed_modified(),
+    )
+    return StreamingHttpResponse(
+        _store_when_done(
+            key, feed.stream(post_items(request, feed, post_list))
+        ),
+        content_type=feed_class.content_type,
+    )
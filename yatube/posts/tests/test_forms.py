@@ -8,6 +8,7 @@ from django.conf import settings
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core import thumbnails
 from posts.models import Follow, Comment, Group, Post
 from ..forms import PostForm
 
@@ -16,7 +17,7 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 User = get_user_model()
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
 class PostURLTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -87,10 +88,7 @@ class PostURLTests(TestCase):
         """Проверка хранения и очищения кэша для index."""
         response = self.authorized_client.get(reverse('posts:index'))
         posts = response.content
-        Post.objects.create(
-            text='test_new_post',
-            author=self.author,
-        )
+        Post.objects.filter(pk=self.post.pk).update(text='test_update')
         response_old = self.authorized_client.get(reverse('posts:index'))
         old_posts = response_old.content
         self.assertEqual(old_posts, posts)
@@ -99,6 +97,30 @@ class PostURLTests(TestCase):
         new_posts = response_new.content
         self.assertNotEqual(old_posts, new_posts)
 
+    def test_cache_index_new_post(self):
+        """Новый пост сразу сбрасывает кэш index."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        Post.objects.create(
+            text='test_new_post',
+            author=self.author,
+        )
+        response_new = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotEqual(response.content, response_new.content)
+        self.assertContains(response_new, 'test_new_post')
+
+    def test_cache_index_per_page(self):
+        """Разные страницы index кэшируются отдельно."""
+        for number in range(10):
+            Post.objects.create(
+                text=f'test_page_post_{number}',
+                author=self.author,
+            )
+        first = self.authorized_client.get(reverse('posts:index'))
+        second = self.authorized_client.get(
+            reverse('posts:index') + '?page=2')
+        self.assertNotEqual(first.content, second.content)
+        self.assertContains(second, self.post.text)
+
     def test_create_post_base(self):
         """Создание поста."""
         post_count = Post.objects.count()
@@ -206,6 +228,18 @@ class PostURLTests(TestCase):
             ).exists()
         )
 
+    def test_thumbnail_placeholder_until_generated(self):
+        """Пока миниатюры нет, страница показывает заглушку."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = self.guest_client.get(url)
+        self.assertContains(response, settings.THUMBNAIL_PLACEHOLDER)
+        thumbnails.drain()
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, settings.THUMBNAIL_PLACEHOLDER)
+        self.assertContains(response, '/media/cache/')
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'posts/small.960w.jpg 960w')
+
     def test_comment_guest_client(self):
         """Неавторизованный пользователь не может комментировать посты."""
         try_comment = {
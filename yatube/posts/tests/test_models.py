@@ -1,6 +1,15 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
-from ..models import Group, Post
+from .. import feed, graph
+from ..counters import recount
+from ..models import Comment, FeedItem, Follow, Group, Post, UserStats
 
 User = get_user_model()
 COUNT_SYMBOL = 15
@@ -29,3 +38,266 @@ class PostModelTest(TestCase):
         err_4 = PostModelTest.group.title
         self.assertEqual(err_1, err_2, 'post error')
         self.assertEqual(err_3, err_4, 'group error')
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются вместе с постами, комментариями и подписками."""
+        post = Post.objects.create(
+            author=self.user, text='Тест пост', group=self.group)
+        Comment.objects.create(author=self.reader, post=post, text='Ком')
+        Follow.objects.create(user=self.reader, author=self.user)
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 1)
+        self.assertEqual(self.user.stats.followers_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(post.comments_count, 1)
+
+        post.group = None
+        post.save()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        post.delete()
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 0)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет рассинхронизацию счётчиков."""
+        Post.objects.create(author=self.user, text='Тест', group=self.group)
+        Group.objects.update(posts_count=7)
+        UserStats.objects.filter(user=self.reader).delete()
+        drift = recount()
+        self.assertEqual(drift['Group.posts_count'], 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertTrue(UserStats.objects.filter(user=self.reader).exists())
+        self.assertFalse(any(recount().values()))
+
+
+class FeedIndexesTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не читают таблицы целиком."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        self.assertIn('post_author_pub_date_id_idx', out.getvalue())
+
+
+class HeavyAuthorTest(TestCase):
+    @mock.patch('posts.feed.FANOUT_LIMIT', 1)
+    def test_posts_survive_when_author_loses_followers(self):
+        """Неразложенные посты остаются в ленте, когда автор «остыл»."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=reader, author=author)
+        Follow.objects.create(user=other, author=author)
+        self.assertTrue(UserStats.objects.get(user=author).feed_pulled)
+        with self.assertNumQueries(1):
+            self.assertEqual(feed.heavy_authors(), {author.pk})
+        post = Post.objects.create(author=author, text='Без раскладки')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+
+        Follow.objects.filter(user=other).delete()
+        cache.delete(feed.HEAVY_AUTHORS_KEY)
+        self.assertEqual(feed.heavy_authors(), {author.pk})
+        post_list, _ = feed.follow_feed(reader)
+        self.assertIn(post, post_list)
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def test_export_import_roundtrip(self):
+        """Выгруженные посты загружаются обратно с датами и связями."""
+        Post.objects.create(author=self.user, text='Первый', group=self.group)
+        Post.objects.create(author=self.user, text='Второй')
+        expected = list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'author', 'group', 'pub_date'))
+        for file_format in ('jsonl', 'csv'):
+            with self.subTest(file_format=file_format):
+                with tempfile.NamedTemporaryFile(
+                    suffix=f'.{file_format}'
+                ) as dump:
+                    call_command('export_posts', dump.name, stderr=StringIO())
+                    Post.objects.all().delete()
+                    call_command(
+                        'import_posts', dump.name, '--batch-size=1',
+                        stdout=StringIO(), stderr=StringIO(),
+                    )
+                self.assertEqual(list(Post.objects.order_by('pk').values_list(
+                    'pk', 'text', 'author', 'group', 'pub_date')), expected)
+                self.assertEqual(
+                    FeedItem.objects.filter(user=self.reader).count(), 2)
+                self.group.refresh_from_db()
+                self.assertEqual(self.group.posts_count, 1)
+                self.assertFalse(any(recount(dry_run=True).values()))
+
+    def test_import_default_batch_size(self):
+        """Пачка по умолчанию больше пределов SQLite на один INSERT."""
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as dump:
+            for number in range(600):
+                dump.write(json.dumps(
+                    {'text': f'Пост {number}', 'author': 'auth'}) + '\n')
+            dump.flush()
+            call_command('import_posts', dump.name, stdout=StringIO(),
+                         stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 600)
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(), 600)
+
+    def test_import_skips_unknown_author(self):
+        """Посты неизвестных авторов и групп пропускаются."""
+        rows = [
+            {'text': 'Есть автор', 'author': 'auth'},
+            {'text': 'Нет автора', 'author': 'nobody'},
+            {'text': 'Нет группы', 'author': 'auth', 'group': 'nope'},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as dump:
+            dump.write('\n'.join(json.dumps(row) for row in rows))
+            dump.flush()
+            out = StringIO()
+            call_command('import_posts', dump.name, stdout=out,
+                         stderr=StringIO())
+        self.assertIn('Загружено: 1, пропущено: 2', out.getvalue())
+        post = Post.objects.get()
+        self.assertEqual(post.text, 'Есть автор')
+        self.assertEqual(
+            Post.objects.create(author=self.user, text='Новый').pk,
+            post.pk + 1,
+        )
+
+
+class SeedTest(TestCase):
+    def snapshot(self):
+        first_user = User.objects.order_by('pk').first().pk
+        first_post = Post.objects.order_by('pk').first().pk
+        return {
+            'posts': [
+                (text, author - first_user) for text, author in
+                Post.objects.order_by('pk').values_list('text', 'author')
+            ],
+            'follows': sorted(
+                (user - first_user, author - first_user)
+                for user, author in
+                Follow.objects.values_list('user', 'author')
+            ),
+            'comments': sorted(
+                (post - first_post, text) for post, text in
+                Comment.objects.values_list('post', 'text')
+            ),
+        }
+
+    def test_seed_is_deterministic(self):
+        """Один seed даёт одни и те же данные, счётчики сходятся."""
+        snapshots = []
+        for _ in range(2):
+            call_command(
+                'seed', '--users=30', '--groups=3', '--posts=200',
+                '--comments=300', '--follows=4', '--batch-size=64',
+                stdout=StringIO(), stderr=StringIO(),
+            )
+            snapshots.append(self.snapshot())
+            self.assertFalse(any(recount(dry_run=True).values()))
+            self.assertEqual(
+                FeedItem.objects.count(),
+                Post.objects.filter(author__following__isnull=False).count(),
+            )
+            last_pk = Post.objects.order_by('pk').last().pk
+            self.assertGreater(
+                Post.objects.create(author=User.objects.first(),
+                                    text='Новый').pk,
+                last_pk,
+            )
+            User.objects.all().delete()
+            Group.objects.all().delete()
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertEqual(len(snapshots[0]['posts']), 200)
+
+    @mock.patch('posts.feed.FANOUT_LIMIT', 3)
+    def test_seed_skips_heavy_authors(self):
+        """Посты популярных авторов не раскладываются, а подмешиваются."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        feed.heavy_authors()
+        call_command(
+            'seed', '--users=30', '--groups=3', '--posts=200',
+            '--comments=0', '--follows=4', '--batch-size=64',
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        heavy = set(UserStats.objects.filter(
+            followers_count__gt=3).values_list('user_id', flat=True))
+        self.assertTrue(heavy)
+        self.assertEqual(feed.heavy_authors(), heavy)
+        self.assertFalse(
+            FeedItem.objects.filter(post__author__in=heavy).exists())
+        self.assertEqual(
+            FeedItem.objects.count(),
+            Post.objects.filter(author__following__isnull=False)
+            .exclude(author__in=heavy).count(),
+        )
+
+
+class FollowGraphTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(5)
+        ]
+        self.ids = [user.pk for user in self.users]
+        first, second, third, fourth, _ = self.users
+        for user, author in ((first, second), (first, third),
+                             (second, first), (second, fourth),
+                             (third, fourth)):
+            Follow.objects.create(user=user, author=author)
+
+    def test_graph_queries(self):
+        """Подписки, подписчики, взаимные и рекомендации."""
+        first, second, third, fourth, fifth = self.ids
+        self.assertEqual(list(graph.following_of(first)), [second, third])
+        self.assertEqual(list(graph.followers_of(fourth)), [second, third])
+        self.assertTrue(graph.is_following(first, second))
+        self.assertFalse(graph.is_following(first, fifth))
+        self.assertEqual(graph.mutual_follows(first), [second])
+        self.assertEqual(graph.suggestions(first), [fourth])
+        with self.assertNumQueries(0):
+            graph.is_following(first, third)
+
+    def test_graph_reloaded_after_change(self):
+        """Подписка и отписка сбрасывают массивы, чтение загружает новые."""
+        first, second, third, fourth, fifth = self.ids
+        graph.following_of(first)
+        graph.followers_of(fifth)
+        Follow.objects.create(user=self.users[0], author=self.users[4])
+        Follow.objects.filter(
+            user=self.users[0], author=self.users[1]).delete()
+        with self.assertNumQueries(2):
+            self.assertEqual(list(graph.following_of(first)), [third, fifth])
+            self.assertEqual(list(graph.followers_of(fifth)), [first])
+        with self.assertNumQueries(0):
+            graph.following_of(first)
@@ -1,9 +1,17 @@
+import os
+import tempfile
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils.http import http_date
 from django import forms
 
-from posts.models import Group, Post
+from posts import comment_queue, graph
+from posts.counters import recount
+from posts.models import Comment, FeedItem, Follow, Group, Post
+from posts.views import COUNT_COMMENTS
 
 User = get_user_model()
 
@@ -153,3 +161,328 @@ class PostURLTests(TestCase):
             with self.subTest(value=value):
                 form_field = response.context['form'].fields[value]
                 self.assertIsInstance(form_field, expected)
+
+    def test_cursor_paginator(self):
+        """Переход по курсору вперёд и назад на странице profile."""
+        for number in range(12):
+            Post.objects.create(
+                author=self.author,
+                text='test-text',
+                group=self.group,
+            )
+        url = reverse('posts:profile', kwargs={'username': 'UserTest'})
+        first_page = self.client.get(url).context['page_obj']
+        response = self.client.get(url, {'cursor': first_page.next_cursor})
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertNotIn(second_page[0], list(first_page))
+
+        response = self.client.get(
+            url, {'cursor': second_page.previous_cursor})
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page))
+
+        response = self.client.get(url, {'cursor': 'broken'})
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_paginator_window(self):
+        """Выводятся только соседние номера страниц, края и пропуски."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text='test-text') for _ in range(120)
+        )
+        response = self.client.get(reverse('posts:index'), {'page': 7})
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            page_obj.window, [1, '…', 5, 6, 7, 8, 9, '…', 13])
+        self.assertContains(response, '?page=13')
+        self.assertNotContains(response, '?page=3"')
+        self.assertContains(response, '<span class="page-link">…</span>', 2)
+
+    def test_follow_feed_materialized(self):
+        """Лента подписок строится из FeedItem и чистится при отписке."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'StasBasov'}))
+        new_post = Post.objects.create(author=self.user, text='feed-text')
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.author, post=new_post).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [new_post])
+
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': 'StasBasov'}))
+        self.assertFalse(FeedItem.objects.filter(user=self.author).exists())
+
+    def test_follow_bulk(self):
+        """Пачка подписок и отписок: ленты, счётчики и кнопки в порядке."""
+        cache.clear()
+        other = User.objects.create_user(username='Other')
+        Post.objects.create(author=other, text='other-text', group=self.group)
+        url = reverse('posts:follow_bulk')
+        response = self.authorized_client.post(url, {
+            'action': 'follow',
+            'username': ['StasBasov', 'Other', 'UserTest', 'nobody'],
+        })
+        self.assertEqual(response.json(), {
+            'action': 'follow',
+            'changed': ['Other', 'StasBasov'],
+            'unknown': ['nobody'],
+        })
+        self.assertEqual(
+            Follow.objects.filter(user=self.author).count(), 2)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.author, post__author=other).exists())
+        self.assertFalse(any(recount(dry_run=True).values()))
+
+        for name in ('posts:index', 'posts:follow_index'):
+            with self.subTest(page=name):
+                response = self.authorized_client.get(reverse(name))
+                self.assertContains(response, 'Отписаться', 1)
+        response = self.authorized_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'any-slug'}))
+        self.assertContains(response, 'Отписаться', 1)
+        self.assertNotContains(response, 'Подписаться')
+
+        response = self.authorized_client.post(url, {
+            'action': 'unfollow', 'username': ['Other'],
+        })
+        self.assertEqual(response.json()['changed'], ['Other'])
+        self.assertFalse(FeedItem.objects.filter(
+            user=self.author, post__author=other).exists())
+        self.assertFalse(any(recount(dry_run=True).values()))
+        response = self.authorized_client.post(
+            url, {'action': 'nothing', 'username': ['Other']})
+        self.assertEqual(response.status_code, 400)
+
+    def test_follow_bulk_stale_graph(self):
+        """Пачка решает по базе, даже если кэш графа отстал."""
+        cache.clear()
+        other = User.objects.create_user(username='Other')
+        url = reverse('posts:follow_bulk')
+        stale = graph.following_of(self.author.pk)
+        Follow.objects.create(user=self.author, author=other)
+        cache.set(graph._key(graph.FOLLOWING, self.author.pk), stale)
+        response = self.authorized_client.post(url, {
+            'action': 'follow', 'username': ['Other'],
+        })
+        self.assertEqual(response.json()['changed'], [])
+        self.assertFalse(any(recount(dry_run=True).values()))
+
+        Follow.objects.filter(user=self.author).delete()
+        Follow.objects.create(user=self.author, author=other)
+        cache.set(graph._key(graph.FOLLOWING, self.author.pk), stale)
+        response = self.authorized_client.post(url, {
+            'action': 'unfollow', 'username': ['Other'],
+        })
+        self.assertEqual(response.json()['changed'], ['Other'])
+        self.assertFalse(
+            Follow.objects.filter(user=self.author, author=other).exists())
+        self.assertFalse(any(recount(dry_run=True).values()))
+
+    def test_comment_queue(self):
+        """Комментарий из очереди виден автору сразу, в базе — после сброса."""
+        queue_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(queue_dir.cleanup)
+        queue_path = os.path.join(queue_dir.name, 'comments.sqlite3')
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        with override_settings(COMMENT_QUEUE=queue_path,
+                               COMMENT_FLUSH_SECONDS=0):
+            response = self.authorized_client.post(
+                url, {'text': 'Сразу видно'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertEqual(response.status_code, 202)
+            self.assertContains(response, 'Сразу видно', status_code=202)
+            self.authorized_client.post(url, {'text': 'Второй'})
+            self.assertFalse(Comment.objects.exists())
+            self.assertEqual(comment_queue.pending(), 2)
+
+            # Проверки поста и автора идут мимо реплик.
+            with override_settings(DATABASE_REPLICAS=['missing']):
+                self.assertEqual(comment_queue.drain(), 2)
+            self.assertEqual(comment_queue.pending(), 0)
+        self.assertEqual(
+            set(self.post.comments.values_list('text', flat=True)),
+            {'Сразу видно', 'Второй'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+        self.assertFalse(any(recount(dry_run=True).values()))
+
+    def test_search(self):
+        """Поиск находит пост по другой форме слова и забывает удалённый."""
+        post = Post.objects.create(
+            author=self.author,
+            text='Красивые закаты над морем',
+        )
+        Post.objects.create(author=self.author, text='Про горы')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'красивый закат'})
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+        post.delete()
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'красивый закат'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_search_paginator_keeps_query(self):
+        """Ссылки паджинатора поиска сохраняют запрос."""
+        for number in range(12):
+            Post.objects.create(author=self.author, text='поиск страницы')
+        response = self.client.get(reverse('posts:search'), {'q': 'поиск'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, 'page=2')
+        self.assertContains(response, '?q=%D0%BF%D0%BE%D0%B8%D1%81%D0%BA')
+
+    def test_post_card_cache(self):
+        """Карточка поста одна на все ленты и сбрасывается при сохранении."""
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(text='stale-text')
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'any-slug'}))
+        self.assertContains(response, 'test-text')
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'fresh-text'
+        post.save()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'UserTest'}))
+        self.assertContains(response, 'fresh-text')
+        self.assertContains(response, 'Подписаться')
+
+    def test_conditional_get(self):
+        """Неизменившаяся страница отдаётся как 304 без рендеринга."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'any-slug'}),
+            reverse('posts:profile', kwargs={'username': 'UserTest'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ):
+            with self.subTest(url=url):
+                # Первый ответ может выставить cookie CSRF, а она
+                # входит в ETag страниц с формами.
+                self.authorized_client.get(url)
+                response = self.authorized_client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_conditional_get_changed(self):
+        """После нового поста или комментария ETag меняется."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='new-text')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'comment'},
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get_unknown_source(self):
+        """Для несуществующей группы или автора 404, а не 304."""
+        etag = self.client.get(reverse('posts:index'))['ETag']
+        feed_etag = self.client.get(
+            reverse('posts:index_feed', kwargs={'feed_type': 'rss'}))['ETag']
+        for url, current_etag in (
+            (reverse('posts:group_list', kwargs={'slug': 'no-slug'}), etag),
+            (reverse('posts:profile', kwargs={'username': 'nobody'}), etag),
+            (reverse('posts:group_feed',
+                     kwargs={'slug': 'no-slug', 'feed_type': 'rss'}),
+             feed_etag),
+            (reverse('posts:profile_feed',
+                     kwargs={'username': 'nobody', 'feed_type': 'rss'}),
+             feed_etag),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=current_etag,
+                    HTTP_IF_MODIFIED_SINCE=http_date(),
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_cached_guest_index_without_queries(self):
+        """Закэшированная главная для гостя не ходит в базу."""
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.text)
+
+    def test_post_etag_follows_csrf_cookie(self):
+        """После нового входа страница с формой не отдаётся как 304."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.authorized_client.get(url)
+        etag = self.authorized_client.get(url)['ETag']
+        self.authorized_client.logout()
+        self.authorized_client.force_login(self.author)
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comments_batches(self):
+        """Комментарии выводятся пачками и догружаются по курсору."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'c{number}')
+            for number in range(COUNT_COMMENTS + 5)
+        )
+        Post.objects.filter(pk=self.post.pk).update(
+            comments_count=COUNT_COMMENTS + 5)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        first = response.context['comments']
+        self.assertEqual(len(first), COUNT_COMMENTS)
+        self.assertIsNotNone(first.next_cursor)
+
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url, {'cursor': first.next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertNotContains(response, 'data-comments-more')
+        data = self.client.get(
+            url, {'cursor': first.next_cursor, 'format': 'json'}).json()
+        self.assertEqual(len(data['comments']), 5)
+        self.assertIsNone(data['next_cursor'])
+        shown = {comment.pk for comment in first}
+        self.assertFalse(shown & {item['id'] for item in data['comments']})
+
+    def test_syndication_feeds(self):
+        """Atom и RSS отдаются потоком, кэшируются и поддерживают 304."""
+        cache.clear()
+        # Для ленты группы или автора остаётся один запрос: проверка,
+        # что они существуют.
+        urls = (
+            (reverse('posts:index_feed', kwargs={'feed_type': 'atom'}),
+             '<entry>', 0),
+            (reverse('posts:group_feed',
+                     kwargs={'slug': 'any-slug', 'feed_type': 'rss'}),
+             '<item>', 1),
+            (reverse('posts:profile_feed',
+                     kwargs={'username': 'UserTest', 'feed_type': 'atom'}),
+             '<entry>', 1),
+        )
+        for url, item_tag, queries in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                self.assertEqual(content.count(item_tag), 1)
+                self.assertIn('test-text', content)
+                with self.assertNumQueries(queries):
+                    cached = self.client.get(url)
+                self.assertEqual(cached.content.decode(), content)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            reverse('posts:index_feed', kwargs={'feed_type': 'json'}))
+        self.assertEqual(response.status_code, 404)
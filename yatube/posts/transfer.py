@@ -0,0 +1,243 @@
+"""Потоковый импорт и экспорт постов в JSONL и CSV."""
+import csv
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import bump_feed_version
+from .counters import bump, bump_user
+from .feed import heavy_authors
+from .models import FeedItem, Follow, Group, Post, User
+from .search import backend as search_backend
+
+FIELDS = ('id', 'text', 'author', 'group', 'pub_date', 'image')
+FORMATS = ('jsonl', 'csv')
+BATCH_SIZE = 1000
+
+
+def guess_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return extension if extension in FORMATS else 'jsonl'
+
+
+def read_rows(stream, file_format):
+    """Построчно читает посты, не загружая файл целиком."""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_rows(stream, file_format, rows):
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Даёт bulk_create сохранить заданные даты вместо текущего времени."""
+    fields = [
+        model._meta.get_field(name)
+        for model in models
+        for name in ('pub_date', 'created')
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def export_rows(batch_size=BATCH_SIZE):
+    """Все посты по возрастанию id, пачками по ключу без OFFSET."""
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list(
+                'pk', 'text', 'author__username', 'group__slug',
+                'pub_date', 'image',
+            )[:batch_size]
+        )
+        if not batch:
+            return
+        for pk, text, author, group, pub_date, image in batch:
+            yield {
+                'id': pk,
+                'text': text,
+                'author': author,
+                'group': group or '',
+                'pub_date': pub_date.isoformat(),
+                'image': image,
+            }
+        last_pk = batch[-1][0]
+
+
+def reset_sequences(*models):
+    """Догоняет автоинкремент после вставки строк с явными id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Importer:
+    """Загружает посты пачками через bulk_create.
+
+    Авторы и группы ищутся по username и slug в словарях, которые
+    дополняются одним запросом на пачку. Сигналы при bulk_create не
+    срабатывают, поэтому ленты, счётчики и поисковый индекс
+    обновляются здесь же, тоже пачками.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, images_from=None):
+        self.batch_size = batch_size
+        self.images_from = images_from
+        self.authors = {}
+        self.groups = {}
+        self.next_pk = (Post.objects.aggregate(last=Max('pk'))['last']
+                        or 0) + 1
+        self.stats = Counter()
+
+    def run(self, rows, progress=None):
+        """Импортирует rows; progress(stats, rows_per_second) — после пачки."""
+        started = time.monotonic()
+        try:
+            with explicit_dates(Post):
+                for chunk in chunks(rows, self.batch_size):
+                    self.import_batch(chunk)
+                    if progress:
+                        elapsed = time.monotonic() - started
+                        progress(
+                            self.stats, self.stats['imported'] / elapsed
+                        )
+        finally:
+            # Пачки до ошибки уже в базе: последовательность и версия
+            # ленты должны их учесть.
+            reset_sequences(Post)
+            bump_feed_version()
+        return self.stats
+
+    def resolve(self, rows):
+        usernames = {row.get('author') for row in rows} - set(self.authors)
+        slugs = {row.get('group') for row in rows if row.get('group')}
+        slugs -= set(self.groups)
+        self.authors.update(dict.fromkeys(usernames))
+        self.authors.update(
+            User.objects.filter(username__in=usernames)
+            .values_list('username', 'pk')
+        )
+        self.groups.update(dict.fromkeys(slugs))
+        self.groups.update(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+
+    def build(self, row):
+        author_id = self.authors.get(row.get('author'))
+        group_slug = row.get('group')
+        group_id = self.groups.get(group_slug) if group_slug else None
+        if not row.get('text') or not author_id or (
+            group_slug and not group_id
+        ):
+            # Пустой текст, неизвестный автор или группа.
+            self.stats['skipped'] += 1
+            return None
+        pub_date = parse_datetime(row.get('pub_date') or '')
+        if pub_date is None:
+            pub_date = timezone.now()
+        elif timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        if row.get('id'):
+            pk = int(row['id'])
+        else:
+            pk = self.next_pk
+        self.next_pk = max(self.next_pk, pk + 1)
+        return Post(
+            pk=pk,
+            text=row['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+            created=pub_date,
+            image=self.store_image(row.get('image') or ''),
+        )
+
+    def store_image(self, path):
+        """Путь из файла — имя в хранилище или файл в images_from."""
+        if not path or not self.images_from:
+            return path
+        with open(os.path.join(self.images_from, path), 'rb') as source:
+            return default_storage.save(
+                f'posts/{os.path.basename(path)}', File(source)
+            )
+
+    def import_batch(self, rows):
+        self.resolve(rows)
+        posts = [post for post in map(self.build, rows) if post]
+        # Размер INSERT выбирает Django: у SQLite есть предел на число
+        # параметров и на число SELECT в одном запросе.
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+            self.fan_out(posts)
+            self.count(posts)
+            search_backend.index_many(
+                (post.pk, post.text) for post in posts
+            )
+        self.stats['imported'] += len(posts)
+
+    def fan_out(self, posts):
+        heavy = heavy_authors()
+        author_ids = {post.author_id for post in posts} - heavy
+        followers = {}
+        for author_id, user_id in Follow.objects.filter(
+            author_id__in=author_ids
+        ).values_list('author_id', 'user_id'):
+            followers.setdefault(author_id, []).append(user_id)
+        FeedItem.objects.bulk_create(
+            [
+                FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+                for post in posts
+                for user_id in followers.get(post.author_id, ())
+            ],
+            ignore_conflicts=True,
+        )
+
+    def count(self, posts):
+        for author_id, delta in Counter(
+            post.author_id for post in posts
+        ).items():
+            bump_user(author_id, 'posts_count', delta)
+        for group_id, delta in Counter(
+            post.group_id for post in posts if post.group_id
+        ).items():
+            bump(Group, group_id, 'posts_count', delta)
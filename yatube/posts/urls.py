@@ -7,6 +7,15 @@ app_name = 'posts'
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('feeds/<str:feed_type>/', views.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feeds/<str:feed_type>/',
+        views.group_feed,
+        name='group_feed'),
+    path(
+        'profile/<str:username>/feeds/<str:feed_type>/',
+        views.profile_feed,
+        name='profile_feed'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -14,7 +23,13 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('search/', views.search, name='search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,36 +1,122 @@
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition, require_POST
+from core.db import estimated_count, writes_to_primary
+from core.paginators import CursorPaginator, WindowPaginator
+from core.thumbnails import pregenerate
+from . import caching, comment_queue, graph
+from .caching import feed_version
+from .feed import follow_feed
+from .follows import MAX_BULK_FOLLOWS, follow_many, unfollow_many
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Follow
+from .search import backend as search_backend
+from .syndication import FEED_TYPES, feed_response
 
 
 COUNT_POST = 10
+# Столько комментариев выводится сразу и отдаётся за одну подгрузку.
+COUNT_COMMENTS = 20
 
 
-def page(request, post_list):
-    paginator = Paginator(post_list, COUNT_POST)
+def paginator_for(post_list, key='pub_date', count=None, estimated=False):
+    post_list = post_list.select_related('author', 'group')
+    return CursorPaginator(
+        post_list, COUNT_POST, key=key, count=count, estimated=estimated
+    )
+
+
+def page(request, post_list, key='pub_date', count=None, estimated=False):
+    paginator = paginator_for(post_list, key, count, estimated)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.get_cursor_page(cursor)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+def mark_following(request, page_obj):
+    """Отмечает у постов страницы, подписан ли читатель на автора.
+
+    Состояние для всех авторов берётся из графа подписок разом.
+    """
+    if not request.user.is_authenticated:
+        return
+    states = graph.follow_states(
+        request.user.pk, {post.author_id for post in page_obj}
+    )
+    for post in page_obj:
+        post.following_author = states[post.author_id]
+
+
+def comment_page(request, post):
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COUNT_COMMENTS,
+        key='created',
+        count=post.comments_count,
+    )
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.get_cursor_page(cursor)
+    return paginator.get_page(1)
+
+
+@condition(caching.feed_etag, caching.feed_last_modified)
 def index(request):
-    posts = Post.objects.select_related('group').all()[:COUNT_POST]
-    post_list = Post.objects.all()
-    page_obj = page(request, post_list)
+    posts = Post.objects.select_related('author', 'group')[:COUNT_POST]
+
+    def index_page():
+        # На большой таблице число страниц берём из статистики базы.
+        count = estimated_count(Post)
+        return page(
+            request, Post.objects.all(), count=count,
+            estimated=count is not None,
+        )
+
+    # Гостю страница нужна, только если фрагмент index_page не в кэше:
+    # до тех пор ни подсчёта, ни выборки постов.
+    page_obj = SimpleLazyObject(index_page)
+    mark_following(request, page_obj)
     context = {
         'posts': posts,
         'page_obj': page_obj,
+        'feed_version': feed_version(),
     }
     return render(request, 'posts/index.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    post_ids = search_backend.search(query) if query else []
+    page_obj = WindowPaginator(post_ids, COUNT_POST).get_page(
+        request.GET.get('page')
+    )
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        page_obj.object_list
+    )
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@condition(caching.feed_etag, caching.feed_last_modified)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()[:COUNT_POST]
+    posts = group.posts.select_related('author')[:COUNT_POST]
     post_list = group.posts.all()
-    page_obj = page(request, post_list)
+    page_obj = page(request, post_list, count=group.posts_count)
+    mark_following(request, page_obj)
     title = ''
     context = {
         'title': title,
@@ -41,28 +127,34 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(caching.feed_etag, caching.feed_last_modified)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     post_list = author.posts.all()
-    page_obj = page(request, post_list)
+    posts_count = author.stats.posts_count
+    page_obj = page(request, post_list, count=posts_count)
     context = {
         'author': author,
-        'num_post_list': post_list.count(),
+        'num_post_list': posts_count,
         'page_obj': page_obj,
-        'following': False,
+        'following': (
+            request.user.is_authenticated
+            and graph.is_following(request.user.pk, author.pk)
+        ),
     }
-    if request.user.is_authenticated:
-        if Follow.objects.filter(user=request.user, author=author).exists():
-            context['following'] = True
     return render(request, 'posts/profile.html', context)
 
 
+@condition(caching.post_etag, caching.post_last_modified)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts = Post.objects.filter(author__exact=post.author).count()
-    posts_count = posts
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    posts_count = post.author.stats.posts_count
     form = CommentForm()
-    comments = post.comments.all().select_related('author')
+    comments = comment_page(request, post)
     context = {
         'post': post,
         'posts_count': posts_count,
@@ -72,15 +164,84 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@condition(caching.post_etag, caching.post_last_modified)
+def comments(request, post_id):
+    """Следующая пачка комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(
+        Post.objects.only('pk', 'comments_count'), pk=post_id
+    )
+    page_obj = comment_page(request, post)
+    if request.GET.get('format') != 'json':
+        context = {
+            'post': post,
+            'comments': page_obj,
+        }
+        return render(request, 'posts/includes/comments.html', context)
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created,
+            }
+            for comment in page_obj
+        ],
+        'next_cursor': page_obj.next_cursor,
+    })
+
+
+def syndication(request, feed_type, source):
+    if feed_type not in FEED_TYPES:
+        raise Http404
+    return feed_response(request, feed_type, source)
+
+
+@condition(caching.syndication_etag, caching.feed_last_modified)
+def index_feed(request, feed_type):
+    def source():
+        return (
+            'Последние обновления на сайте',
+            reverse('posts:index'),
+            Post.objects.all(),
+        )
+    return syndication(request, feed_type, source)
+
+
+@condition(caching.syndication_etag, caching.feed_last_modified)
+def group_feed(request, slug, feed_type):
+    def source():
+        group = get_object_or_404(Group, slug=slug)
+        return (
+            f'Записи сообщества {group.title}',
+            reverse('posts:group_list', kwargs={'slug': slug}),
+            group.posts.all(),
+        )
+    return syndication(request, feed_type, source)
+
+
+@condition(caching.syndication_etag, caching.feed_last_modified)
+def profile_feed(request, username, feed_type):
+    def source():
+        author = get_object_or_404(User, username=username)
+        return (
+            f'Все посты пользователя {author}',
+            reverse('posts:profile', kwargs={'username': username}),
+            author.posts.all(),
+        )
+    return syndication(request, feed_type, source)
+
+
 @login_required(login_url="user:login")
 def post_create(request):
     form = PostForm()
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            pregenerate(post.image)
             return redirect('posts:profile', username=request.user.username)
         context = {'form': form}
     context = {'form': form}
@@ -104,26 +265,53 @@ def post_edit(request, post_id):
     }
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            pregenerate(post.image)
         return redirect('posts:post_detail', post_id=post.id)
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    """Сохраняет комментарий сразу или ставит его в очередь.
+
+    На запрос из скрипта страницы отвечает HTML нового комментария,
+    чтобы автор увидел его, не дожидаясь записи в базу.
+    """
     form = CommentForm(request.POST or None)
-    if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
+    from_script = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if not form.is_valid():
+        if from_script:
+            return JsonResponse(form.errors, status=400)
+        return redirect('posts:post_detail', post_id=post_id)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    if comment_queue.enabled():
+        # Пост проверяется при записи пачки, здесь база не нужна.
+        comment_queue.enqueue(post_id, request.user.pk, comment.text)
+        comment.post_id = post_id
+        comment.pub_date = comment.created = timezone.now()
+        status = 202
+    else:
+        comment.post = get_object_or_404(Post, id=post_id)
         comment.save()
+        status = 201
+    if from_script:
+        return render(
+            request, 'posts/includes/comment.html', {'comment': comment},
+            status=status,
+        )
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = page(request, post_list)
+    post_list, key = follow_feed(request.user)
+    page_obj = page(request, post_list, key)
+    # В ленте подписок только посты тех, на кого читатель подписан:
+    # граф для кнопок не нужен.
+    for post in page_obj:
+        post.following_author = True
     context = {
         'page_obj': page_obj,
     }
@@ -131,6 +319,7 @@ def follow_index(request):
 
 
 @login_required
+@writes_to_primary
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -142,7 +331,39 @@ def profile_follow(request, username):
 
 
 @login_required
+@writes_to_primary
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:follow_index')
+
+
+@login_required
+@writes_to_primary
+@require_POST
+def follow_bulk(request):
+    """Подписка или отписка сразу на несколько username.
+
+    Ждёт action=follow|unfollow и повторяющееся поле username, отвечает
+    JSON со списками изменённых и ненайденных имён.
+    """
+    actions = {'follow': follow_many, 'unfollow': unfollow_many}
+    action = request.POST.get('action')
+    usernames = request.POST.getlist('username')
+    if action not in actions:
+        return JsonResponse(
+            {'error': 'action должен быть follow или unfollow.'}, status=400
+        )
+    if len(usernames) > MAX_BULK_FOLLOWS:
+        return JsonResponse(
+            {'error': f'Не больше {MAX_BULK_FOLLOWS} имён за раз.'},
+            status=400,
+        )
+    authors = list(User.objects.filter(username__in=usernames))
+    changed = actions[action](request.user, authors)
+    found = {author.username for author in authors}
+    return JsonResponse({
+        'action': action,
+        'changed': sorted(author.username for author in changed),
+        'unknown': sorted(set(usernames) - found),
+    })
@@ -16,6 +16,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
@@ -29,7 +30,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.db.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,7 +46,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -57,16 +60,55 @@ TEMPLATES = [
         },
     },
 ]
+# В профиле production шаблоны разбираются один раз при запуске и живут
+# в памяти, а каждый шаблон и include замеряет свой рендеринг. По
+# умолчанию он включается вместе с DEBUG = False, задаётся и явно:
+# YATUBE_TEMPLATE_PROFILE=production.
+TEMPLATE_PROFILE = os.getenv(
+    'YATUBE_TEMPLATE_PROFILE', 'debug' if DEBUG else 'production'
+)
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS'].update(
+        loaders=[(
+            'core.template_loaders.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+        precompile=True,
+    )
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Соединение с базой живёт между запросами, а не открывается на каждый.
+CONN_MAX_AGE = 60
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
     }
 }
 
+# Реплики только для чтения. Локально их изображают копии файла базы:
+# YATUBE_REPLICAS=2 подключит db.replica1.sqlite3 и db.replica2.sqlite3.
+for number in range(1, int(os.getenv('YATUBE_REPLICAS', '0')) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -110,8 +152,85 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
+# Кэш задаётся через YATUBE_CACHE:
+# redis://host:6379/0 — Redis (нужен пакет django-redis), общий для всех
+# воркеров, с атомарными add и incr;
+# путь к каталогу — файловый кэш, только для разработки: add и incr в нём
+# не атомарны между процессами, а каждая запись просматривает каталог;
+# без переменной — свой кэш в памяти у каждого процесса.
+CACHE_LOCATION = os.getenv('YATUBE_CACHE', '')
+
+LOCMEM_CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+if CACHE_LOCATION.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_LOCATION,
+        }
+    }
+elif CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_LOCATION,
+            # По умолчанию 300: массивы графа и фрагменты вытесняли бы
+            # друг друга.
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = LOCMEM_CACHES
+
+# Версии лент и графа подписок живут в кэше часами, только если их смену
+# сразу видят все воркеры. Иначе см. core.cache.shared_timeout.
+CACHE_SHARED = CACHE_LOCATION.startswith(('redis://', 'rediss://'))
+
+# Тесты идут с кэшем в памяти и не чистят кэш запущенного сайта.
+TEST_RUNNER = 'core.test_runner.LocalCacheRunner'
+
+THUMBNAIL_BACKEND = 'core.thumbnails.BackgroundThumbnailBackend'
+
+THUMBNAIL_PLACEHOLDER = 'img/placeholder.svg'
+
+THUMBNAIL_WORKERS = 2
+
+THUMBNAIL_PRESETS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+
+RENDITION_WIDTHS = [480, 960, 1440]
+
+RENDITION_RATIO = (960, 339)
+
+# Порядок важен: браузер берёт первый поддерживаемый формат.
+# Форматы, которые не умеет сохранять установленный Pillow, пропускаются.
+RENDITION_FORMATS = ['AVIF', 'WEBP', 'JPEG']
+
+RENDITION_QUALITY = 80
+
+# Для PostgreSQL: 'posts.search.PostgresBackend'.
+SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# Запросы дольше этого порога пишутся в лог yatube.performance.
+SLOW_REQUEST_SECONDS = 1.0
+
+# С этих адресов доступен /internal/metrics/.
+INTERNAL_IPS = ['127.0.0.1']
+
+# Файл локальной очереди комментариев, например
+# YATUBE_COMMENT_QUEUE=/var/lib/yatube/comments.sqlite3. Тогда
+# add_comment только проверяет форму и ставит комментарий в очередь,
+# а в базу комментарии пишутся пачками из фонового потока. Пусто —
+# комментарий сохраняется сразу, как раньше.
+COMMENT_QUEUE = os.getenv('YATUBE_COMMENT_QUEUE', '')
+
+# Пауза между сбросами очереди. 0 — без фонового потока: очередь
+# сбрасывает comment_queue.drain() или команда flush_comments.
+COMMENT_FLUSH_SECONDS = 0.5
+
+COMMENT_FLUSH_BATCH = 1000